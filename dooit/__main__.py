@@ -1,22 +1,49 @@
-from typing import Optional
+from datetime import datetime
+from typing import Optional, TextIO, Tuple
 import click
 from pathlib import Path
 from platformdirs import user_data_dir, user_config_dir
+from dooit.api.manager import DB_PROFILES, DEFAULT_DB_PROFILE
 
 OLD_CONFIG = Path(user_data_dir("dooit")) / "todo.yaml"
 VERSION = "3.2.3"
 
 
-def run_dooit(config: Optional[str] = None, db_path: Optional[str] = None):
+def run_dooit(
+    config: Optional[str] = None,
+    db_path: Optional[str] = None,
+    db_profile: Optional[str] = None,
+):
     config_path = None if not config else Path(config)
 
     if config_path and not (config_path.exists() and config_path.is_file()):
         print(f"Config file {config} not found.")
         return
 
+    from dooit.api import manager
     from dooit.ui.tui import Dooit
 
-    Dooit(config=config_path, db_path=db_path).run()
+    try:
+        Dooit(config=config_path, db_path=db_path, db_profile=db_profile).run()
+    finally:
+        # in case the app crashed before unmounting
+        manager.flush_pending()
+
+
+def connect_read_only(obj: dict) -> None:
+    """
+    Open the database for a command which only reads it, leaving it as it is
+    """
+
+    from dooit.api import manager
+    from dooit.api.exceptions import DooitError
+    from dooit.utils.cli_logger import logger
+
+    try:
+        manager.connect(obj["db"], obj["db_profile"], read_only=True)
+    except DooitError as e:
+        logger.error(str(e))
+        raise SystemExit(1)
 
 
 @click.group(
@@ -31,11 +58,19 @@ def run_dooit(config: Optional[str] = None, db_path: Optional[str] = None):
 )
 @click.option("-c", "--config", default=None, help="Path to config file")
 @click.option("--db", default=None, help="Path to database file")
+@click.option(
+    "--db-profile",
+    default=None,
+    type=click.Choice(list(DB_PROFILES)),
+    help=f"SQLite tuning profile for the database connection [default: {DEFAULT_DB_PROFILE}]",
+)
 @click.pass_context
-def main(ctx, version: bool, config: str, db: str) -> None:
+def main(ctx, version: bool, config: str, db: str, db_profile: str) -> None:
     if version:
         return print(f"dooit - {VERSION}")
 
+    ctx.obj = dict(db=db, db_profile=db_profile)
+
     if ctx.invoked_subcommand is None:
         if OLD_CONFIG.exists():
             from dooit.utils.cli_logger import logger
@@ -46,20 +81,153 @@ def main(ctx, version: bool, config: str, db: str) -> None:
             )
             return
 
-        run_dooit(config=config, db_path=db)
+        run_dooit(config=config, db_path=db, db_profile=db_profile)
 
 
 @main.command(help="Migrate data from v2 to v3.")
-def migrate() -> None:
+@click.pass_obj
+def migrate(obj: dict) -> None:
     from dooit.utils.cli_logger import logger
 
     logger.info("Migrating from v2 ...")
+    from dooit.api import manager
     from dooit.backport.migrate_from_v2 import Migrator2to3
 
+    manager.connect(obj["db"], obj["db_profile"])
     migrator = Migrator2to3()
     migrator.migrate()
 
 
+@main.command(help="Print todos as JSON, without starting the app.")
+@click.option(
+    "-w", "--workspace", multiple=True, help="Only todos in workspaces with this name"
+)
+@click.option("-s", "--status", type=click.Choice(["pending", "completed", "overdue"]))
+@click.option("--due-after", type=click.DateTime(), help="Only todos due after this")
+@click.option("--due-before", type=click.DateTime(), help="Only todos due before this")
+@click.option("-t", "--tag", multiple=True, help="Only todos with this @tag")
+@click.option("-u", "--min-urgency", type=int, help="Only todos this urgent or more")
+@click.option(
+    "-f",
+    "--format",
+    "output_format",
+    type=click.Choice(["ndjson", "json"]),
+    default="ndjson",
+    show_default=True,
+)
+@click.pass_obj
+def query(
+    obj: dict,
+    workspace: Tuple[str, ...],
+    status: Optional[str],
+    due_after: Optional[datetime],
+    due_before: Optional[datetime],
+    tag: Tuple[str, ...],
+    min_urgency: Optional[int],
+    output_format: str,
+) -> None:
+    import json
+    from sqlalchemy import select
+    from dooit.api import Workspace, manager
+    from dooit.api.query import stream_todos, todo_query
+
+    connect_read_only(obj)
+
+    workspace_ids = []
+    if workspace:
+        workspace_ids = manager.session.scalars(
+            select(Workspace.id).where(Workspace.description.in_(workspace))
+        ).all()
+        if not workspace_ids:
+            raise click.BadParameter("No such workspace", param_hint="--workspace")
+
+    tags = [i.lstrip("@") for i in tag]
+    todos = stream_todos(
+        todo_query(workspace_ids, status, due_after, due_before, tags, min_urgency),
+        tags,
+    )
+
+    if output_format == "ndjson":
+        for todo in todos:
+            click.echo(json.dumps(todo, ensure_ascii=False))
+        return
+
+    click.echo("[", nl=False)
+    for index, todo in enumerate(todos):
+        click.echo(("," if index else "") + json.dumps(todo, ensure_ascii=False))
+    click.echo("]")
+
+
+@main.command(name="import", help="Import todos from a todo.txt, CSV or JSON file.")
+@click.argument("file", type=click.File("r", encoding="utf-8"))
+@click.option(
+    "-f",
+    "--format",
+    "input_format",
+    type=click.Choice(["json", "ndjson", "csv", "todotxt"]),
+    help="Format of the file, guessed from its extension by default",
+)
+@click.option(
+    "-w", "--workspace", help="Workspace for todos without one, created if needed"
+)
+@click.pass_obj
+def import_(
+    obj: dict, file: TextIO, input_format: Optional[str], workspace: Optional[str]
+) -> None:
+    from dooit.api import import_todos, manager
+    from dooit.api.exceptions import DooitError
+    from dooit.utils.cli_logger import logger
+    from dooit.utils.import_formats import EXTENSIONS, READERS
+
+    input_format = input_format or EXTENSIONS.get(Path(file.name).suffix)
+    if input_format is None:
+        raise click.BadParameter("Unknown file format", param_hint="--format")
+
+    manager.connect(obj["db"], obj["db_profile"])
+
+    try:
+        count = import_todos(READERS[input_format](file), workspace)
+    except DooitError as e:
+        logger.error(str(e))
+        raise SystemExit(1)
+
+    logger.success(f"Imported {count} todos")
+
+
+@main.command(help="Export workspaces and todos as JSON.")
+@click.argument("file", type=click.File("w", encoding="utf-8"), default="-")
+@click.option(
+    "-f",
+    "--format",
+    "output_format",
+    type=click.Choice(["ndjson", "json"]),
+    default="ndjson",
+    show_default=True,
+)
+@click.option(
+    "-s",
+    "--since",
+    type=int,
+    help="Only export what changed after the `seq` of a previous export",
+)
+@click.pass_obj
+def export(obj: dict, file: TextIO, output_format: str, since: Optional[int]) -> None:
+    from dooit.api.export import can_export_since, write_json, write_ndjson
+
+    connect_read_only(obj)
+
+    if since is not None and not can_export_since(since):
+        # on stderr, as the export itself may go to stdout
+        click.echo(
+            f"Changes since {since} are no longer available, exporting everything",
+            err=True,
+        )
+        since = None
+
+    write = write_json if output_format == "json" else write_ndjson
+    write(file, since)
+
+
 @main.command(help="Show config location.")
 def config_loc() -> None:
     """Print the location of the configuration file."""
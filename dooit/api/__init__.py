@@ -1,8 +1,10 @@
 from .model import DooitModel, BaseModel
 from .todo import Todo
 from .workspace import Workspace
-from .manager import manager
+from .manager import manager, ChangeSet
+from .change_log import ChangeLog
 from .hooks import fix_hooks, validation_hooks, update_hooks
+from .bulk import import_todos
 
 __all__ = [
     "BaseModel",
@@ -10,7 +12,10 @@ __all__ = [
     "Todo",
     "Workspace",
     "manager",
+    "ChangeSet",
+    "ChangeLog",
     "fix_hooks",
     "validation_hooks",
     "update_hooks",
+    "import_todos",
 ]
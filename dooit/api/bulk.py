@@ -0,0 +1,292 @@
+import re
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from dateutil import parser
+from sqlalchemy import func, insert, select
+from .exceptions import BulkImportError
+from .hooks.validation_hooks import clamp_urgency
+from .manager import manager
+from .todo import Todo
+from .workspace import Workspace
+
+# Todos inserted with a single statement
+BATCH_SIZE = 5000
+
+DURATION_LEGEND = {
+    "m": "minutes",
+    "h": "hours",
+    "d": "days",
+    "w": "weeks",
+}
+
+BOOLEANS = {
+    "true": True,
+    "yes": True,
+    "1": True,
+    "false": False,
+    "no": False,
+    "0": False,
+}
+
+TodoRecord = Dict[str, Any]
+# (parent workspace id, parent todo id)
+ParentKey = Tuple[Optional[int], Optional[int]]
+
+
+def parse_due(value: Union[str, datetime, None]) -> Optional[datetime]:
+    if not value or isinstance(value, datetime):
+        return value or None
+
+    try:
+        # exports are in ISO format, which is much faster to read
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return parser.parse(value)
+
+
+def parse_recurrence(value: Union[str, int, float, None]) -> Optional[timedelta]:
+    """
+    Parse a recurrence in seconds or in the `<number><m/h/d/w>` format
+    """
+
+    if value is None or value == "":
+        return None
+
+    if isinstance(value, (int, float)) or value.replace(".", "", 1).isdigit():
+        return timedelta(seconds=float(value))
+
+    if not re.match(r"^(\d+)[mhdw]$", value):
+        raise ValueError(f"Invalid recurrence: {value}")
+
+    return timedelta(**{DURATION_LEGEND[value[-1]]: int(value[:-1])})
+
+
+def parse_bool(value: Union[str, int, bool]) -> bool:
+    """
+    Parse a boolean, also from the strings found in CSV files
+    """
+
+    if isinstance(value, (bool, int)):
+        return bool(value)
+
+    text = str(value).strip().lower()
+    if text not in BOOLEANS:
+        raise ValueError(f"Invalid boolean: {value}")
+
+    return BOOLEANS[text]
+
+
+def parse_int(value: Union[str, int, None], default: int) -> int:
+    if value is None or value == "":
+        return default
+
+    if isinstance(value, float) or (
+        isinstance(value, str) and not value.strip().lstrip("-").isdigit()
+    ):
+        raise ValueError(f"Expected a whole number, got {value!r}")
+
+    return int(value)
+
+
+def todo_values(record: TodoRecord) -> Dict[str, Any]:
+    """
+    Column values for a todo record, applying the same rules as the hooks
+    """
+
+    try:
+        recurrence = parse_recurrence(record.get("recurrence"))
+        if "status" in record:
+            pending = record["status"] != "completed"
+        else:
+            pending = parse_bool(record.get("pending", True))
+
+        return dict(
+            description=str(record.get("description") or ""),
+            due=parse_due(record.get("due")),
+            effort=parse_int(record.get("effort"), 0),
+            recurrence=recurrence,
+            urgency=clamp_urgency(parse_int(record.get("urgency"), 1)),
+            pending=pending or recurrence is not None,
+        )
+    except (AttributeError, TypeError, ValueError) as e:
+        # readers of text formats note where each record comes from
+        line = record.get("line")
+        where = f"on line {line}" if line is not None else repr(record)
+        raise BulkImportError(f"Invalid todo {where}: {e}") from e
+
+
+def flatten_records(records: Iterable[TodoRecord]) -> Iterator[TodoRecord]:
+    """
+    Flatten records nested with a `todos` key, parents first
+    """
+
+    keys = count()
+
+    def flatten(record: TodoRecord) -> Iterator[TodoRecord]:
+        record = dict(record)
+        children = record.pop("todos", None) or []
+        if children and record.get("id") is None:
+            record["id"] = ("nested", next(keys))
+
+        yield record
+        for child in children:
+            yield from flatten({**child, "parent_todo_id": record["id"]})
+
+    for record in records:
+        yield from flatten(record)
+
+
+class TodoImporter:
+    """
+    Insert todos in batches, assigning their order up front instead of going
+    through the per-row hooks
+
+    Records refer to their parent with `parent_todo_id`, matched against the
+    `id` of another record, or else with the name of a `workspace`
+    """
+
+    def __init__(
+        self, workspace: Optional[str] = None, batch_size: int = BATCH_SIZE
+    ) -> None:
+        self.workspace = workspace
+        self.batch_size = batch_size
+        self.count = 0
+        self._ids: Dict[Any, int] = {}
+        self._workspaces: Dict[str, int] = {}
+        self._order: Dict[ParentKey, int] = {}
+        self._waiting: List[TodoRecord] = []
+
+    def _workspace_id(self, name: str) -> int:
+        if name not in self._workspaces:
+            query = select(Workspace).where(
+                Workspace.description == name, Workspace.is_root == False
+            )
+            workspace = manager.session.scalars(query).first()
+            if workspace is None:
+                workspace = Workspace(description=name)
+                workspace.parent_workspace = Workspace._get_or_create_root()
+                manager.session.add(workspace)
+                manager.session.flush()
+
+            self._workspaces[name] = workspace.id
+
+        return self._workspaces[name]
+
+    def _parent(self, record: TodoRecord) -> Optional[ParentKey]:
+        parent = record.get("parent_todo_id")
+        if parent is not None:
+            todo_id = self._ids.get(parent)
+            return None if todo_id is None else (None, todo_id)
+
+        name = record.get("workspace") or self.workspace
+        if not name:
+            raise BulkImportError(f"No workspace given for todo {record!r}")
+
+        return self._workspace_id(name), None
+
+    def _next_order_index(self, parent: ParentKey) -> int:
+        if parent not in self._order:
+            workspace_id, todo_id = parent
+            if todo_id is not None:
+                # todos are only ever added to the ones being imported
+                self._order[parent] = 0
+            else:
+                query = select(func.max(Todo.order_index)).where(
+                    Todo.parent_workspace_id == workspace_id,
+                )
+                last = manager.session.scalar(query)
+                self._order[parent] = 0 if last is None else last + 1
+
+        index = self._order[parent]
+        self._order[parent] += 1
+        return index
+
+    def _insert(self, records: List[TodoRecord]) -> None:
+        """
+        Insert the records whose parent is known, until none of them is left
+        """
+
+        records = self._waiting + records
+
+        while records:
+            ready, rows, waiting = [], [], []
+            for record in records:
+                parent = self._parent(record)
+                if parent is None:
+                    waiting.append(record)
+                    continue
+
+                ready.append(record)
+                rows.append(
+                    dict(
+                        todo_values(record),
+                        parent_workspace_id=parent[0],
+                        parent_todo_id=parent[1],
+                        order_index=self._next_order_index(parent),
+                    )
+                )
+
+            if not rows:
+                break
+
+            # without `render_nulls`, a change in which values are None
+            # starts another executemany
+            query = (
+                insert(Todo)
+                .returning(Todo.id, sort_by_parameter_order=True)
+                .execution_options(render_nulls=True)
+            )
+            ids = manager.session.scalars(query, rows).all()
+            for record, _id in zip(ready, ids):
+                if record.get("id") is not None:
+                    self._ids[record["id"]] = _id
+
+            self.count += len(rows)
+            records = waiting
+
+        self._waiting = records
+
+    def add(self, records: Iterable[TodoRecord]) -> int:
+        """
+        Insert `records` (without committing) and return how many were added
+        """
+
+        batch = []
+        for record in flatten_records(records):
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                self._insert(batch)
+                batch = []
+
+        self._insert(batch)
+
+        if self._waiting:
+            raise BulkImportError(
+                f"{len(self._waiting)} todos refer to a parent todo which doesn't exist"
+            )
+
+        return self.count
+
+
+def import_todos(records: Iterable[TodoRecord], workspace: Optional[str] = None) -> int:
+    """
+    Import todos from dicts within a single transaction
+
+    Args:
+        records: Todo values, with children nested under `todos` or referring to
+            their parent's `id` with `parent_todo_id`
+        workspace: Name of the workspace for records without one, created if needed
+
+    Returns:
+        Number of todos imported
+    """
+
+    try:
+        imported = TodoImporter(workspace).add(records)
+        manager.commit()
+    except Exception:
+        manager.session.rollback()
+        raise
+
+    return imported
@@ -0,0 +1,108 @@
+from typing import Optional, Sequence, Union
+from sqlalchemy import Connection, Engine, Row, select, text
+from sqlalchemy.orm import Mapped, Session, mapped_column
+from .model import BaseModel
+
+# Number of entries kept around for other instances to catch up on
+CHANGE_LOG_SIZE = 10_000
+
+MODEL_NAMES = {
+    "todo": "Todo",
+    "workspace": "Workspace",
+}
+
+PARENT_COLUMNS = {
+    "todo": ("parent_workspace_id", "parent_todo_id"),
+    "workspace": ("parent_workspace_id", "NULL"),
+}
+
+
+class ChangeLog(BaseModel):
+    """
+    Changes to the todo and workspace tables, written by triggers
+    """
+
+    __tablename__ = "change_log"
+
+    seq: Mapped[int] = mapped_column(primary_key=True)
+    table_name: Mapped[str]
+    row_id: Mapped[int]
+    operation: Mapped[str]
+    parent_workspace_id: Mapped[Optional[int]]
+    parent_todo_id: Mapped[Optional[int]]
+
+
+def model_uuid(table_name: str, row_id: int) -> str:
+    return f"{MODEL_NAMES[table_name]}_{row_id}"
+
+
+def read_changes(connection: Union[Connection, Session], since: int) -> Sequence[Row]:
+    """
+    Change log entries written after `since`, oldest first
+    """
+
+    query = (
+        select(
+            ChangeLog.seq,
+            ChangeLog.table_name,
+            ChangeLog.row_id,
+            ChangeLog.operation,
+            ChangeLog.parent_workspace_id,
+            ChangeLog.parent_todo_id,
+        )
+        .where(ChangeLog.seq > since)
+        .order_by(ChangeLog.seq)
+    )
+    return connection.execute(query).all()
+
+
+def _trigger(table: str, event: str, row: str, when: str = "") -> str:
+    parent_workspace, parent_todo = PARENT_COLUMNS[table]
+
+    def column(name: str) -> str:
+        return name if name == "NULL" else f"{row}.{name}"
+
+    name = f"{table}_change_log_{event.replace(' ', '_').lower()}_{row.lower()}"
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table}
+    {when}
+    BEGIN
+        INSERT INTO change_log
+            (table_name, row_id, operation, parent_workspace_id, parent_todo_id)
+        VALUES
+            ('{table}', {row}.id, '{event.split()[0]}',
+             {column(parent_workspace)}, {column(parent_todo)});
+    END
+    """
+
+
+def _triggers():
+    for table, (parent_workspace, parent_todo) in PARENT_COLUMNS.items():
+        parent_changed = " OR ".join(
+            f"OLD.{name} IS NOT NEW.{name}"
+            for name in (parent_workspace, parent_todo)
+            if name != "NULL"
+        )
+
+        yield _trigger(table, "INSERT", "NEW")
+        yield _trigger(table, "UPDATE", "NEW")
+        yield _trigger(table, "UPDATE", "OLD", f"WHEN {parent_changed}")
+        yield _trigger(table, "DELETE", "OLD")
+
+
+def install_change_log(engine: Engine) -> None:
+    """
+    Create the change log triggers and drop entries nobody should need anymore
+    """
+
+    with engine.begin() as connection:
+        for trigger in _triggers():
+            connection.execute(text(trigger))
+
+        connection.execute(
+            text("""
+            DELETE FROM change_log
+            WHERE seq <= (SELECT max(seq) FROM change_log) - :size
+            """),
+            {"size": CHANGE_LOG_SIZE},
+        )
@@ -0,0 +1,63 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional, Sequence, TypeVar
+from sqlalchemy import Connection, Engine, Row, text
+
+T = TypeVar("T")
+
+
+class DatabaseWorker:
+    """
+    Single thread with its own connection, for reads which should not
+    block the event loop
+    """
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="dooit-db"
+        )
+        self._connection: Optional[Connection] = None
+        self._data_version: Optional[int] = None
+
+    @property
+    def connection(self) -> Connection:
+        # only ever used from the worker thread
+        if self._connection is None:
+            self._connection = self.engine.connect()
+
+        return self._connection
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    def read_changes(self, since: int) -> Sequence[Row]:
+        """
+        Change log entries after `since`, if anything was committed since the
+        last call
+        """
+
+        from dooit.api.change_log import read_changes
+
+        connection = self.connection
+        try:
+            version = connection.execute(text("PRAGMA data_version")).scalar_one()
+            if version == self._data_version:
+                return []
+
+            self._data_version = version
+            return read_changes(connection, since)
+        finally:
+            # end the read transaction so the next call sees new commits
+            connection.rollback()
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def close(self) -> None:
+        self._executor.submit(self._close)
+        self._executor.shutdown(wait=False)
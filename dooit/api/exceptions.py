@@ -34,6 +34,33 @@ class TodoAdditionError(DooitError):
     """
 
 
+class DatabaseProfileError(DooitError):
+    """
+    Raised when user tries to use a database profile which does not exist
+    """
+
+
+class DatabaseSchemaError(DooitError):
+    """
+    Raised when a database opened read-only is missing or needs to be upgraded first
+    """
+
+
+class BulkImportError(DooitError):
+    """
+    Raised when todos being imported have invalid values or missing parents
+    """
+
+
+class ConcurrentEditError(DooitError):
+    """
+    Raised when saving an item which another dooit instance changed since it was loaded
+    """
+
+    def __str__(self) -> str:
+        return "Changed by another dooit instance, reloaded the latest version"
+
+
 class NoNodeError(DooitError):
     """
     Raised when user tried to perform an operation that requires a node, but no node is selected
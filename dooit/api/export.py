@@ -0,0 +1,262 @@
+import json
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Set, TextIO, Tuple
+from sqlalchemy import Row, Select, String, Table, func, literal, select
+from .change_log import ChangeLog
+from .manager import manager
+from .todo import Todo
+from .workspace import Workspace
+
+# Version of the export format, written in the header
+EXPORT_VERSION = 1
+
+# Rows fetched from the database at a time while streaming
+BATCH_SIZE = 500
+
+TABLES: Dict[str, Table] = {
+    "workspace": Workspace.__table__,  # type: ignore
+    "todo": Todo.__table__,  # type: ignore
+}
+
+ExportRow = Dict[str, Any]
+# rows of a snapshot along with how deep they are nested
+TreeRow = Tuple[int, ExportRow]
+
+
+COLUMNS: Dict[str, List[str]] = {
+    kind: [column.name for column in table.columns] for kind, table in TABLES.items()
+}
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+
+    raise TypeError(f"Cannot export {value!r}")
+
+
+def _dumps(row: ExportRow) -> str:
+    return json.dumps(row, ensure_ascii=False, default=_json_value)
+
+
+def _as_dict(kind: str, row: Row) -> ExportRow:
+    # the table columns are always selected first
+    return dict(type=kind, **dict(zip(COLUMNS[kind], row)))
+
+
+@contextmanager
+def _read_transaction() -> Iterator[None]:
+    """
+    Read everything within a single transaction, so that the exported rows
+    match the `seq` of the header even while other instances write
+    """
+
+    connection = manager.session.connection()
+    # pysqlite only begins a transaction before writing
+    began = not connection.connection.dbapi_connection.in_transaction  # type: ignore
+    if began:
+        connection.exec_driver_sql("BEGIN")
+
+    try:
+        yield
+    finally:
+        if began:
+            connection.exec_driver_sql("COMMIT")
+
+
+def _stream(query: Select) -> Iterator[Row]:
+    return iter(manager.session.execute(query.execution_options(yield_per=BATCH_SIZE)))
+
+
+def last_change() -> int:
+    """
+    Sequence number of the latest change, to export the next changes from
+    """
+
+    return manager.session.scalar(select(func.max(ChangeLog.seq))) or 0
+
+
+def can_export_since(since: int) -> bool:
+    """
+    Whether the change log still covers every change made after `since`
+    """
+
+    if since <= 0:
+        return False
+
+    first, last = manager.session.execute(
+        select(func.min(ChangeLog.seq), func.max(ChangeLog.seq))
+    ).one()
+
+    if first is None:
+        return False
+
+    return first <= since + 1 and since <= last
+
+
+def _todo_tree(workspace_id: int) -> Select:
+    """
+    Todos of a workspace, parents right before their children
+    """
+
+    def key(todo):
+        # zero padded so that text order matches the numeric order
+        return func.printf("%011d%019d", todo.order_index, todo.id, type_=String)
+
+    top = select(Todo.id, literal(0).label("depth"), key(Todo).label("path")).where(
+        Todo.parent_workspace_id == workspace_id
+    )
+
+    tree = top.cte("todo_tree", recursive=True)
+    tree = tree.union_all(
+        select(Todo.id, tree.c.depth + 1, tree.c.path + key(Todo)).join(
+            tree, Todo.parent_todo_id == tree.c.id
+        )
+    )
+
+    return (
+        select(TABLES["todo"], tree.c.depth)
+        .join(tree, Todo.id == tree.c.id)
+        .order_by(tree.c.path)
+    )
+
+
+def iter_snapshot() -> Iterator[TreeRow]:
+    """
+    Every workspace followed by its todos and then its child workspaces,
+    streamed in the order they appear in the app
+    """
+
+    # workspaces are few, the todos are streamed per workspace
+    children: Dict[Optional[int], List[Row]] = defaultdict(list)
+    query = select(TABLES["workspace"]).order_by(Workspace.order_index, Workspace.id)
+    root = None
+    for row in manager.session.execute(query):
+        if row.is_root:
+            root = row.id
+        else:
+            children[row.parent_workspace_id].append(row)
+
+    def walk(parent: Optional[int], depth: int) -> Iterator[TreeRow]:
+        for row in children.get(parent, []):
+            yield depth, _as_dict("workspace", row)
+
+            for todo in _stream(_todo_tree(row.id)):
+                yield depth + 1 + todo.depth, _as_dict("todo", todo)
+
+            yield from walk(row.id, depth + 1)
+
+    yield from walk(root, 0)
+    if root is not None:
+        # left over from before the root workspace existed
+        yield from walk(None, 0)
+
+
+def iter_changes(since: int) -> Iterator[ExportRow]:
+    """
+    Rows changed after the change `since`, followed by the ids of deleted rows
+    """
+
+    updated: Dict[str, Set[int]] = defaultdict(set)
+    deleted: Dict[str, Set[int]] = defaultdict(set)
+
+    query = select(ChangeLog.table_name, ChangeLog.row_id, ChangeLog.operation).where(
+        ChangeLog.seq > since
+    )
+    for table_name, row_id, operation in _stream(query.order_by(ChangeLog.seq)):
+        if operation == "DELETE":
+            updated[table_name].discard(row_id)
+            deleted[table_name].add(row_id)
+        else:
+            deleted[table_name].discard(row_id)
+            updated[table_name].add(row_id)
+
+    for kind, table in TABLES.items():
+        ids = sorted(updated[kind])
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start : start + BATCH_SIZE]
+            query = select(table).where(table.c.id.in_(batch)).order_by(table.c.id)
+            for row in manager.session.execute(query):
+                yield _as_dict(kind, row)
+
+    for kind in TABLES:
+        for row_id in sorted(deleted[kind]):
+            yield dict(type=kind, id=row_id, deleted=True)
+
+
+def _header(seq: int, since: Optional[int]) -> Dict[str, Any]:
+    return dict(dooit_export=EXPORT_VERSION, seq=seq, since=since)
+
+
+def write_ndjson(file: TextIO, since: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Write a header line and then a line per row, all rows when `since` is None
+    """
+
+    with _read_transaction():
+        header = _header(last_change(), since)
+        file.write(json.dumps(header) + "\n")
+
+        if since is None:
+            rows: Iterator[ExportRow] = (row for _, row in iter_snapshot())
+        else:
+            rows = iter_changes(since)
+
+        for row in rows:
+            file.write(_dumps(row) + "\n")
+
+    return header
+
+
+def write_json(file: TextIO, since: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Write a single object with nested `workspaces` and `todos`, or the
+    flat list of `changes` when `since` is given
+    """
+
+    with _read_transaction():
+        return _write_json(file, since)
+
+
+def _write_json(file: TextIO, since: Optional[int]) -> Dict[str, Any]:
+    header = _header(last_change(), since)
+    file.write(json.dumps(header)[:-1])
+
+    if since is not None:
+        file.write(', "changes": [')
+        for index, row in enumerate(iter_changes(since)):
+            file.write(("," if index else "") + _dumps(row))
+        file.write("]}\n")
+        return header
+
+    file.write(', "workspaces": [')
+
+    # child list opened in each of the objects left open, if any
+    stack: List[Optional[str]] = []
+    first = True
+
+    for depth, row in iter_snapshot():
+        while len(stack) > depth:
+            file.write("]}" if stack.pop() else "}")
+            first = False
+
+        key = row.pop("type") + "s"
+        if stack and stack[-1] != key:
+            file.write(f'{"]" if stack[-1] else ""}, "{key}": [')
+            stack[-1] = key
+            first = True
+
+        file.write(("" if first else ",") + _dumps(row)[:-1])
+        stack.append(None)
+        first = False
+
+    while stack:
+        file.write("]}" if stack.pop() else "}")
+
+    file.write("]}\n")
+    return header
@@ -0,0 +1,154 @@
+from typing import Dict, List, Union
+from sqlalchemy import Connection, Engine, select, text
+from sqlalchemy.exc import OperationalError
+from .manager import manager
+from .todo import Todo
+from .workspace import Workspace
+
+# Full text index of each table's descriptions
+FTS_TABLES = {
+    "todo": "todo_fts",
+    "workspace": "workspace_fts",
+}
+
+# `@` is part of a word, so that tags are indexed as they are written
+TOKENIZER = "unicode61 tokenchars '@'"
+
+# Results returned by default
+SEARCH_LIMIT = 50
+
+SearchResult = Union[Todo, Workspace]
+
+
+def _triggers(table: str, fts: str):
+    insert = f"""
+        INSERT INTO {fts} (rowid, description) VALUES (NEW.id, NEW.description);
+    """
+    delete = f"""
+        INSERT INTO {fts} ({fts}, rowid, description)
+        VALUES ('delete', OLD.id, OLD.description);
+    """
+
+    yield f"""
+    CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table}
+    BEGIN {insert} END
+    """
+    yield f"""
+    CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table}
+    BEGIN {delete} END
+    """
+    yield f"""
+    CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF description ON {table}
+    BEGIN {delete} {insert} END
+    """
+
+
+def _exists(connection: Connection, fts: str) -> bool:
+    query = text("SELECT 1 FROM sqlite_master WHERE name = :name")
+    return connection.execute(query, {"name": fts}).first() is not None
+
+
+def fts_installed(engine: Engine) -> bool:
+    """
+    Whether the full text indexes were created, without creating them
+    """
+
+    with engine.connect() as connection:
+        return all(_exists(connection, fts) for fts in FTS_TABLES.values())
+
+
+def install_fts(engine: Engine) -> bool:
+    """
+    Create the full text indexes and the triggers keeping them up to date,
+    indexing the existing rows when an index is first created
+
+    Returns:
+        Whether the indexes are available, as sqlite can be built without FTS5
+    """
+
+    with engine.begin() as connection:
+        for table, fts in FTS_TABLES.items():
+            if not _exists(connection, fts):
+                try:
+                    connection.execute(
+                        text(f"""
+                        CREATE VIRTUAL TABLE {fts} USING fts5(
+                            description,
+                            content='{table}',
+                            content_rowid='id',
+                            tokenize="{TOKENIZER}"
+                        )
+                        """)
+                    )
+                except OperationalError:
+                    return False
+
+                connection.execute(
+                    text(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+                )
+
+            for trigger in _triggers(table, fts):
+                connection.execute(text(trigger))
+
+    return True
+
+
+def fts_query(query: str) -> str:
+    """
+    Convert words typed by the user into an FTS5 query matching the rows
+    which have words starting with each of them
+    """
+
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _search_like(query: str, limit: int) -> List[SearchResult]:
+    results: List[SearchResult] = []
+    for model in (Workspace, Todo):
+        terms = [model.description.contains(term) for term in query.split()]
+        statement = select(model).where(*terms).order_by(model.id).limit(limit)
+
+        results.extend(manager.session.scalars(statement))
+
+    return results[:limit]
+
+
+def search(query: str, limit: int = SEARCH_LIMIT) -> List[SearchResult]:
+    """
+    Todos and workspaces in every workspace with words starting with each
+    word of `query` (e.g. `rep @work`), best matches first
+    """
+
+    if not query.split():
+        return []
+
+    if not manager.has_fts:
+        return _search_like(query, limit)
+
+    ranked = manager.session.execute(
+        text(
+            " UNION ALL ".join(
+                f"SELECT '{table}' AS name, rowid, bm25({fts}) AS rank "
+                f"FROM {fts} WHERE {fts} MATCH :query"
+                for table, fts in FTS_TABLES.items()
+            )
+            + " ORDER BY rank LIMIT :limit"
+        ),
+        {"query": fts_query(query), "limit": limit},
+    ).all()
+
+    ranked_keys = [(name, rowid) for name, rowid, _ in ranked]
+    ids: Dict[str, List[int]] = {table: [] for table in FTS_TABLES}
+    for name, rowid in ranked_keys:
+        ids[name].append(rowid)
+
+    loaded = {}
+    for model in (Todo, Workspace):
+        name = model.__tablename__
+        if ids[name]:
+            statement = select(model).where(model.id.in_(ids[name]))
+            for obj in manager.session.scalars(statement):
+                loaded[name, obj.id] = obj
+
+    return [loaded[key] for key in ranked_keys if key in loaded]
@@ -0,0 +1,132 @@
+from typing import Iterator
+from sqlalchemy import ColumnElement, Connection, Engine, and_, text
+
+# Paths are the ids from the top down, each followed by the separator:
+#   workspace: "<root id>/<workspace id>/.../<id>/"
+#   todo: "<workspace id>/<top level todo id>/.../<id>/"
+SEPARATOR = "/"
+
+# parent of each table, along with the SQL for the path of a row's parent
+PARENT_PATHS = {
+    "workspace": """
+        CASE WHEN NEW.parent_workspace_id IS NULL THEN ''
+        ELSE (SELECT path FROM workspace WHERE id = NEW.parent_workspace_id)
+        END
+    """,
+    "todo": """
+        CASE WHEN NEW.parent_todo_id IS NULL THEN NEW.parent_workspace_id || '/'
+        ELSE (SELECT path FROM todo WHERE id = NEW.parent_todo_id)
+        END
+    """,
+}
+
+PARENT_COLUMNS = {
+    "workspace": ("parent_workspace_id",),
+    "todo": ("parent_workspace_id", "parent_todo_id"),
+}
+
+# the whole hierarchy, for databases from before the paths existed
+TREES = {
+    "workspace": """
+        SELECT id, id || '/' FROM workspace WHERE parent_workspace_id IS NULL
+        UNION ALL
+        SELECT workspace.id, tree.path || workspace.id || '/'
+        FROM workspace JOIN tree ON workspace.parent_workspace_id = tree.id
+    """,
+    "todo": """
+        SELECT id, parent_workspace_id || '/' || id || '/'
+        FROM todo WHERE parent_todo_id IS NULL
+        UNION ALL
+        SELECT todo.id, tree.path || todo.id || '/'
+        FROM todo JOIN tree ON todo.parent_todo_id = tree.id
+    """,
+}
+
+
+def below(column: ColumnElement, path: str) -> ColumnElement[bool]:
+    """
+    Rows whose path starts with `path`, leaving out the row with that path,
+    as a range over the path index
+    """
+
+    # every path ends with the separator, and "0" is the character after it
+    return and_(column > path, column < path[:-1] + "0")
+
+
+def _triggers(table: str) -> Iterator[str]:
+    parent_path = PARENT_PATHS[table]
+    moved = " OR ".join(
+        f"OLD.{column} IS NOT NEW.{column}" for column in PARENT_COLUMNS[table]
+    )
+
+    yield f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_path_insert AFTER INSERT ON {table}
+    BEGIN
+        UPDATE {table} SET path = {parent_path} || NEW.id || '/'
+        WHERE id = NEW.id;
+    END
+    """
+
+    # the row keeps its own part of the path, along with its whole subtree.
+    # The ORM already bumped the row's own version, its subtree gets a new one
+    yield f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_path_move
+    AFTER UPDATE OF {", ".join(PARENT_COLUMNS[table])} ON {table}
+    WHEN {moved}
+    BEGIN
+        UPDATE {table}
+        SET path = {parent_path}
+            || substr(path, length(OLD.path) - length(OLD.id || '/') + 1),
+            version = version + (id != NEW.id)
+        WHERE path >= OLD.path
+        AND path < substr(OLD.path, 1, length(OLD.path) - 1) || '0';
+    END
+    """
+
+
+def fill_paths(connection: Connection) -> None:
+    """
+    Work out the paths of the rows which don't have one yet
+    """
+
+    for table, tree in TREES.items():
+        missing = connection.execute(
+            text(f"SELECT 1 FROM {table} WHERE path IS NULL LIMIT 1")
+        ).first()
+        if not missing:
+            continue
+
+        connection.execute(
+            text(f"""
+            WITH RECURSIVE tree(id, path) AS ({tree})
+            UPDATE {table} SET path = tree.path
+            FROM tree
+            WHERE tree.id = {table}.id AND {table}.path IS NOT tree.path
+            """)
+        )
+
+
+def _drop_outdated_triggers(connection: Connection, table: str) -> None:
+    # the first move trigger didn't bump the versions of the subtree
+    name = f"{table}_path_move"
+    sql = connection.execute(
+        text("SELECT sql FROM sqlite_master WHERE name = :name"), {"name": name}
+    ).scalar()
+
+    if sql is not None and "version" not in sql:
+        connection.execute(text(f"DROP TRIGGER {name}"))
+
+
+def install_paths(engine: Engine) -> None:
+    """
+    Create the triggers keeping the paths up to date, filling in the paths
+    of existing databases
+    """
+
+    with engine.begin() as connection:
+        for table in PARENT_PATHS:
+            _drop_outdated_triggers(connection, table)
+            for trigger in _triggers(table):
+                connection.execute(text(trigger))
+
+        fill_paths(connection)
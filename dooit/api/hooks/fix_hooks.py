@@ -2,6 +2,9 @@ from sqlalchemy import event, text
 from ..workspace import Workspace
 from ..todo import Todo
 
+# shifted siblings get a new version, like the rows changed by `update_hooks`,
+# so that stale copies of them held by other instances can't be saved over
+
 
 @event.listens_for(Workspace, "before_insert")
 def fix_order_id_workspace(_, connection, target: Workspace):
@@ -16,10 +19,14 @@ def fix_order_id_workspace(_, connection, target: Workspace):
         connection.execute(
             text("""
             UPDATE workspace
-            SET order_index = order_index + 1
-            WHERE order_index >= :current_index
+            SET order_index = order_index + 1, version = version + 1
+            WHERE parent_workspace_id IS :parent_workspace_id
+            AND order_index >= :current_index
             """),
-            {"current_index": target.order_index, "target_id": target.id},
+            {
+                "current_index": target.order_index,
+                "parent_workspace_id": target.parent_workspace_id,
+            },
         )
 
 
@@ -32,8 +39,14 @@ def fix_order_id_todo(_, connection, target: Todo):
         connection.execute(
             text("""
             UPDATE todo
-            SET order_index = order_index + 1
-            WHERE order_index >= :current_index
+            SET order_index = order_index + 1, version = version + 1
+            WHERE parent_workspace_id IS :parent_workspace_id
+            AND parent_todo_id IS :parent_todo_id
+            AND order_index >= :current_index
             """),
-            {"current_index": target.order_index, "target_id": target.id},
+            {
+                "current_index": target.order_index,
+                "parent_workspace_id": target.parent_workspace_id,
+                "parent_todo_id": target.parent_todo_id,
+            },
         )
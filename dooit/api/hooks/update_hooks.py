@@ -1,50 +1,129 @@
 from datetime import datetime
-from sqlalchemy import event, update
+from typing import List, Optional
+from sqlalchemy import ColumnElement, Connection, event, inspect, select, update
+from sqlalchemy.orm import aliased
+from ..hierarchy import SEPARATOR, below
 from ..todo import Todo
 
+# The status is propagated with a constant number of statements, however
+# deep the subtree is. The rows are updated directly, so these hooks don't
+# fire again for the todos they change.
+
+# changed rows get a new version, so that stale copies of them held by other
+# instances can't be saved over the change
+_next_version = Todo.version + 1
+
+
+def _pending_changed(target: Todo) -> bool:
+    return inspect(target).attrs.pending.history.has_changes()
+
+
+def _stored_path(connection: Connection, target: Todo) -> Optional[str]:
+    # as written by the triggers, the loaded path may have expired
+    return connection.execute(
+        select(Todo.path).where(Todo.id == target.id)
+    ).scalar_one_or_none()
+
+
+def _descendants(connection: Connection, target: Todo) -> Optional[ColumnElement]:
+    path = _stored_path(connection, target)
+    return None if path is None else below(Todo.path, path)
+
+
+def _ancestor_ids(connection: Connection, target: Todo) -> List[int]:
+    path = _stored_path(connection, target)
+    if path is None:
+        return []
+
+    # the path starts with the workspace and ends with the todo itself
+    return [int(i) for i in path.split(SEPARATOR)[1:-2]]
+
 
 @event.listens_for(Todo, "before_update")
 def update_children_to_pending(_, connection, target: Todo):
-    if not target.pending:
+    if not target.pending or not _pending_changed(target):
         return
 
-    if any(todo.pending for todo in target.todos):
+    descendants = _descendants(connection, target)
+    if descendants is None:
         return
 
-    query = update(Todo).where(Todo.parent_todo_id == target.id).values(pending=True)
-    connection.execute(query)
+    # leave the subtree as it is if some of it was already reopened
+    query = select(Todo.id).where(descendants, Todo.pending == True).limit(1)
+    if connection.execute(query).first():
+        return
+
+    connection.execute(
+        update(Todo).where(descendants).values(pending=True, version=_next_version)
+    )
 
 
 @event.listens_for(Todo, "before_update")
 def update_children_to_completed(_, connection, target: Todo):
-    if target.pending:
+    if target.pending or not _pending_changed(target):
         return
 
-    query = update(Todo).where(Todo.parent_todo_id == target.id).values(pending=False)
-    connection.execute(query)
+    descendants = _descendants(connection, target)
+    if descendants is None:
+        return
+
+    query = update(Todo).where(descendants, Todo.pending == True)
+    connection.execute(query.values(pending=False, version=_next_version))
 
 
 @event.listens_for(Todo, "before_update")
 def update_parent_to_pending(mapper, connection, target: Todo):
-    if not target.pending or not target.parent_todo:
+    if not target.pending or not _pending_changed(target):
+        return
+
+    if target.parent_todo_id is None:
+        return
+
+    if not (ancestors := _ancestor_ids(connection, target)):
         return
 
-    query = update(Todo).where(Todo.id == target.parent_todo_id).values(pending=True)
-    connection.execute(query)
+    query = update(Todo).where(Todo.id.in_(ancestors), Todo.pending == False)
+    connection.execute(query.values(pending=True, version=_next_version))
 
 
 @event.listens_for(Todo, "before_update")
 def update_parent_to_completed(mapper, connection, target: Todo):
-    if target.pending or not target.parent_todo:
+    if target.pending or not _pending_changed(target):
+        return
+
+    if target.parent_todo_id is None:
         return
 
-    parent = target.parent_todo
-    all_sibling_completed = all([not sibling.pending for sibling in parent.todos])
-    if all_sibling_completed:
-        query = (
-            update(Todo).where(Todo.id == target.parent_todo_id).values(pending=False)
+    # climb up the parents for as long as every other child is completed
+    parent = aliased(Todo)
+    sibling = aliased(Todo)
+
+    chain = (
+        select(Todo.id, Todo.parent_todo_id.label("parent_id"))
+        .where(Todo.id == target.id)
+        .cte("chain", recursive=True)
+    )
+    others_pending = (
+        select(sibling.id)
+        .where(
+            sibling.parent_todo_id == parent.id,
+            sibling.id != chain.c.id,
+            sibling.pending == True,
         )
-        connection.execute(query)
+        .exists()
+    )
+    chain = chain.union_all(
+        select(parent.id, parent.parent_todo_id)
+        .join(chain, parent.id == chain.c.parent_id)
+        .where(~others_pending)
+    )
+
+    query = update(Todo).where(
+        Todo.id.in_(select(chain.c.id)),
+        Todo.id != target.id,
+        Todo.pending == True,
+    )
+    connection.execute(query.values(pending=False, version=_next_version))
 
 
 @event.listens_for(Todo, "before_update")
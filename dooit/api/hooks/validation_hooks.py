@@ -13,11 +13,14 @@ def validate_parent_todo(mapper, connection, target: Todo):
         raise MultipleParentError("Todo cannot have both a parent workspace and todo")
 
 
+def clamp_urgency(urgency: int) -> int:
+    return min(4, max(1, urgency))
+
+
 @event.listens_for(Todo, "before_insert")
 @event.listens_for(Todo, "before_update")
 def validate_urgency(mapper, connection, target: Todo):
     if target.urgency is None:
         return
 
-    target.urgency = max(1, target.urgency)
-    target.urgency = min(4, target.urgency)
+    target.urgency = clamp_urgency(target.urgency)
@@ -1,8 +1,65 @@
+import asyncio
 import os
-from typing import Optional
-from sqlalchemy import create_engine
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Union
+from urllib.parse import quote
+from sqlalchemy import URL, Row, create_engine, event, func, inspect, select, text
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.schema import CreateColumn
 from ._vars import DATABASE_FILE
+from .db_worker import DatabaseWorker
+from .exceptions import (
+    ConcurrentEditError,
+    DatabaseProfileError,
+    DatabaseSchemaError,
+)
+
+# Pragmas applied to every connection, by profile name
+DB_PROFILES: Dict[str, Dict[str, Union[str, int]]] = {
+    # commits only wait for the write-ahead log, without a full fsync
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "temp_store": "MEMORY",
+        "cache_size": -16_000,
+        "mmap_size": 256 * 1024 * 1024,
+        "busy_timeout": 5000,
+    },
+    # sqlite defaults, e.g. for databases on network filesystems
+    "safe": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+    },
+}
+DEFAULT_DB_PROFILE = "wal"
+
+# Changed rows re-fetched with a single query
+REFETCH_BATCH_SIZE = 500
+
+
+@dataclass
+class ChangeSet:
+    """
+    Rows changed by other connections since the last poll, as model uuids
+    """
+
+    updated: Set[str] = field(default_factory=set)
+    deleted: Set[str] = field(default_factory=set)
+    parents: Set[str] = field(default_factory=set)
+    full: bool = False
+    # last change log entry covered
+    last: int = 0
+
+    @property
+    def tables(self) -> Set[str]:
+        return {uuid.split("_")[0].lower() for uuid in self.updated | self.deleted}
+
+    def __bool__(self) -> bool:
+        return self.full or bool(self.updated or self.deleted or self.parents)
 
 
 class Manager:
@@ -10,41 +67,353 @@ class Manager:
     Class for managing sqlalchemy sessions
     """
 
-    def connect(self, path: Optional[str] = None):
+    def __init__(self) -> None:
+        # seconds to wait before committing, `None` commits right away
+        self.commit_delay: Optional[float] = None
+        self._pending_commit: Optional[asyncio.TimerHandle] = None
+        # called with the error of a delayed commit, which has no caller
+        self.on_commit_error: Optional[Callable[[Exception], None]] = None
+        self.worker: Optional[DatabaseWorker] = None
+        self.read_only = False
+        # whether sqlite has FTS5 for the description indexes
+        self.has_fts = False
+
+    def connect(
+        self,
+        path: Optional[str] = None,
+        profile: Optional[str] = None,
+        read_only: bool = False,
+    ):
         """
         Connect to database using a file path
 
         Args:
             path: Path to SQLite database file. Can include ~ for home directory.
+            profile: Name of the pragma profile in `DB_PROFILES` to connect with.
+            read_only: Open an existing database without creating or upgrading
+                its schema, for commands which only read it.
         """
 
         from dooit.api import BaseModel
+        from dooit.api.change_log import install_change_log
+        from dooit.api.fts import fts_installed, install_fts
+        from dooit.api.hierarchy import install_paths
+
+        self.flush_pending()
+        if self.worker is not None:
+            self.worker.close()
+
+        self.profile = self._check_profile(profile or DEFAULT_DB_PROFILE)
+        self.read_only = read_only
 
         path = path or DATABASE_FILE
         path = os.path.expanduser(path)
-        connection_string = f"sqlite:///{path}"
-        self.engine = create_engine(connection_string)
+        if read_only:
+            if not os.path.exists(path):
+                raise DatabaseSchemaError(
+                    f"No database at {path}, start dooit once to create it"
+                )
+
+            # sqlite refuses every write on the connection itself
+            url = URL.create(
+                "sqlite",
+                database=f"file:{quote(path)}",
+                query={"mode": "ro", "uri": "true"},
+            )
+        else:
+            url = URL.create("sqlite", database=path)
+
+        self.engine = create_engine(url)
+        event.listen(self.engine, "connect", self._on_connect)
         self.session = Session(self.engine)
 
-        BaseModel.metadata.create_all(bind=self.engine)
-        self._db_last_modified = self._get_db_last_modified()
+        if read_only:
+            self._check_schema(path)
+            self.has_fts = fts_installed(self.engine)
+        else:
+            BaseModel.metadata.create_all(bind=self.engine)
+            self._add_missing_columns()
+            self._create_missing_indexes()
+            install_paths(self.engine)
+            install_change_log(self.engine)
+            self.has_fts = install_fts(self.engine)
 
-    def _get_db_last_modified(self) -> Optional[float]:
-        database = self.engine.url.database
-        assert database is not None
+        self._data_version = self._get_data_version()
+        self._last_change = self._get_last_change()
 
-        try:
-            return os.path.getmtime(database)
-        except OSError:
-            return None
+        # an in-memory database can't be shared with another connection,
+        # and a read-only one has nothing to write in the background
+        if not read_only and self.engine.url.database not in (None, "", ":memory:"):
+            self.worker = DatabaseWorker(self.engine)
+        else:
+            self.worker = None
+
+    @staticmethod
+    def _check_profile(profile: str) -> str:
+        if profile not in DB_PROFILES:
+            raise DatabaseProfileError(
+                f"Unknown database profile '{profile}', "
+                f"expected one of: {', '.join(DB_PROFILES)}"
+            )
+
+        return profile
+
+    def _pragmas(self) -> List[str]:
+        return [
+            f"PRAGMA {name} = {value}"
+            for name, value in DB_PROFILES[self.profile].items()
+            # the journal mode is stored in the file, which can't be written
+            if not (self.read_only and name == "journal_mode")
+        ]
+
+    def _on_connect(self, dbapi_connection, _) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in self._pragmas():
+            cursor.execute(pragma)
+
+        cursor.close()
+
+    def set_profile(self, profile: str) -> None:
+        """
+        Switch the connection to another pragma profile
+        """
+
+        self.profile = self._check_profile(profile)
+        self._commit()
+
+        connection = self.session.connection()
+        for pragma in self._pragmas():
+            connection.exec_driver_sql(pragma)
+
+    def _check_schema(self, path: str) -> None:
+        """
+        Make sure a database opened read-only has every table and column,
+        as it can't be upgraded
+        """
+
+        from dooit.api import BaseModel
+
+        inspector = inspect(self.engine)
+        tables = set(inspector.get_table_names())
+
+        for table in BaseModel.metadata.sorted_tables:
+            columns = set()
+            if table.name in tables:
+                columns = {c["name"] for c in inspector.get_columns(table.name)}
+
+            if not columns.issuperset(table.columns.keys()):
+                raise DatabaseSchemaError(
+                    f"The database at {path} is from an older version of dooit, "
+                    "start dooit once to upgrade it"
+                )
+
+    def _add_missing_columns(self) -> None:
+        """
+        Add columns declared after a database was created, as `create_all`
+        leaves existing tables as they are
+        """
+
+        from dooit.api import BaseModel
+
+        with self.engine.begin() as connection:
+            for table in BaseModel.metadata.sorted_tables:
+                existing = {
+                    column["name"]
+                    for column in inspect(connection).get_columns(table.name)
+                }
+
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+
+                    # along with the server default, which fills the existing rows
+                    ddl = CreateColumn(column).compile(dialect=self.engine.dialect)
+                    connection.execute(
+                        text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+                    )
+
+    def _create_missing_indexes(self) -> None:
+        """
+        Add indexes declared after a database was created, as `create_all`
+        only creates them along with new tables
+        """
+
+        from dooit.api import BaseModel
+
+        with self.engine.begin() as connection:
+            for table in BaseModel.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(connection, checkfirst=True)
+
+    def _get_data_version(self) -> int:
+        return self.session.execute(text("PRAGMA data_version")).scalar_one()
+
+    def _get_last_change(self) -> int:
+        from dooit.api.change_log import ChangeLog
+
+        query = select(func.max(ChangeLog.seq))
+        return self.session.execute(query).scalar() or 0
+
+    def fetch_changes(self) -> ChangeSet:
+        """
+        Read the change log for rows committed by other connections, which
+        also returns our own rows committed since the last poll
+        """
+
+        from dooit.api.change_log import read_changes
+
+        # our own flushed rows are in the change log too
+        self.flush_pending()
+
+        data_version = self._get_data_version()
+        if data_version == self._data_version:
+            return ChangeSet()
+
+        self._data_version = data_version
+
+        since = self._last_change
+        changes = self._collect(read_changes(self.session, since), since)
+        self._last_change = max(self._last_change, changes.last)
+        return changes
+
+    async def fetch_changes_async(self) -> ChangeSet:
+        """
+        Same as `fetch_changes`, but read the change log on the database worker
+        """
+
+        if self.worker is None:
+            return self.fetch_changes()
+
+        self.flush_pending()
+        changes = await self.worker.run(self._read_changes, self._last_change)
+        self._last_change = max(self._last_change, changes.last)
+        return changes
+
+    def _read_changes(self, since: int) -> ChangeSet:
+        assert self.worker is not None
+        return self._collect(self.worker.read_changes(since), since)
+
+    @staticmethod
+    def _collect(rows: Sequence[Row], since: int) -> ChangeSet:
+        from dooit.api.change_log import model_uuid
+
+        if not rows:
+            return ChangeSet()
+
+        changes = ChangeSet(full=rows[0].seq != since + 1, last=rows[-1].seq)
+
+        for row in rows:
+            uuid = model_uuid(row.table_name, row.row_id)
+            if row.operation == "DELETE":
+                changes.deleted.add(uuid)
+                changes.updated.discard(uuid)
+            else:
+                changes.updated.add(uuid)
+
+            if row.parent_workspace_id is not None:
+                changes.parents.add(model_uuid("workspace", row.parent_workspace_id))
+
+            if row.parent_todo_id is not None:
+                changes.parents.add(model_uuid("todo", row.parent_todo_id))
+
+        return changes
+
+    def _get_loaded(self, uuid: str):
+        from dooit.api import Todo, Workspace
+
+        name, _id = uuid.split("_")
+        model = Todo if name == "Todo" else Workspace
+        return self.session.identity_map.get(identity_key(model, int(_id)))
+
+    def _loaded(self, uuids: Set[str]) -> List[Any]:
+        identity_map = self.session.identity_map
+
+        # large batches are cheaper to match against what is loaded
+        if len(uuids) > len(identity_map):
+            return [
+                identity_map[key]
+                for key in identity_map.keys()
+                if f"{key[0].__name__}_{key[1][0]}" in uuids
+            ]
+
+        return [obj for uuid in uuids if (obj := self._get_loaded(uuid))]
+
+    def _refetch(self, objs: List[Any]) -> None:
+        """
+        Load the current rows of `objs` in bulk over the loaded values,
+        dropping the objects whose row is gone
+        """
+
+        ids: Dict[type, List[int]] = defaultdict(list)
+        for obj in objs:
+            ids[type(obj)].append(obj.id)
+
+        for model, model_ids in ids.items():
+            found = set()
+            for start in range(0, len(model_ids), REFETCH_BATCH_SIZE):
+                batch = model_ids[start : start + REFETCH_BATCH_SIZE]
+                query = (
+                    select(model)
+                    .where(model.id.in_(batch))
+                    .execution_options(populate_existing=True)
+                )
+                found.update(obj.id for obj in self.session.scalars(query))
+
+            for obj in objs:
+                if isinstance(obj, model) and obj.id not in found:
+                    self.session.expunge(obj)
+
+    def _expire_children(self, objs: List[Any]) -> None:
+        for obj in objs:
+            # only the children changed, the row itself is still current
+            children = [
+                key
+                for key in ("todos", "workspaces")
+                if key in inspect(obj).mapper.relationships
+            ]
+            self.session.expire(obj, children)
+
+    def apply_changes(self, changes: ChangeSet) -> None:
+        """
+        Re-fetch the loaded objects affected by `changes` with a query per
+        table, leaving the other loaded objects as they are
+        """
+
+        from dooit.api import Todo, Workspace
+
+        if changes.full:
+            # anything may have changed since the log was trimmed
+            loaded = [
+                obj
+                for obj in self.session.identity_map.values()
+                if isinstance(obj, (Todo, Workspace))
+            ]
+            self._refetch(loaded)
+            self._expire_children([obj for obj in loaded if obj in self.session])
+            return
+
+        for obj in self._loaded(changes.deleted):
+            self.session.expunge(obj)
+
+        self._refetch(self._loaded(changes.updated))
+        self._expire_children(self._loaded(changes.parents))
+
+    def poll_changes(self) -> ChangeSet:
+        changes = self.fetch_changes()
+        if changes:
+            self.apply_changes(changes)
+
+        return changes
+
+    async def poll_changes_async(self) -> ChangeSet:
+        changes = await self.fetch_changes_async()
+        if changes:
+            self.apply_changes(changes)
+
+        return changes
 
     def has_changed(self) -> bool:
-        current_last_modified = self._get_db_last_modified()
-        if current_last_modified and self._db_last_modified != current_last_modified:
-            self._db_last_modified = current_last_modified
-            manager.session.expire_all()
-            return True
-        return False
+        return bool(self.poll_changes())
 
     def delete(self, obj):
         self.session.delete(obj)
@@ -55,8 +424,69 @@ class Manager:
         self.commit()
 
     def commit(self):
-        self.session.commit()
-        self._db_last_modified = self._get_db_last_modified()
+        """
+        Commit the session, or with a `commit_delay` flush it right away and
+        commit once the delay has passed, so that a burst of changes is
+        written with a single commit
+        """
+
+        if self.commit_delay is None:
+            return self._commit()
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self._commit()
+
+        self._write(self.session.flush)
+        # hooks update rows with plain statements, so reload what the
+        # commit would have expired. Nothing is left unflushed by now
+        self.session.expire_all()
+        if self._pending_commit is None:
+            self._pending_commit = loop.call_later(
+                self.commit_delay, self._delayed_commit
+            )
+
+    def flush_pending(self) -> None:
+        """
+        Commit right away if a delayed commit is waiting
+        """
+
+        if self._pending_commit is not None:
+            self._commit()
+
+    def _commit(self) -> None:
+        if self._pending_commit is not None:
+            self._pending_commit.cancel()
+            self._pending_commit = None
+
+        # the change log cursor stays where it is, as other instances may
+        # have written entries since the last poll. Our own rows are read
+        # back along with them, and re-fetching those changes nothing
+        self._write(self.session.commit)
+
+    def _delayed_commit(self) -> None:
+        try:
+            self._commit()
+        except Exception as e:
+            self.session.rollback()
+            if self.on_commit_error is None:
+                raise
+
+            self.on_commit_error(e)
+
+    def _write(self, write: Callable[[], None]) -> None:
+        """
+        Flush or commit the session, dropping the changes to rows which
+        another instance changed since they were loaded
+        """
+
+        try:
+            write()
+        except StaleDataError as e:
+            # the loaded objects are expired, and re-read on their next access
+            self.session.rollback()
+            raise ConcurrentEditError() from e
 
 
 manager = Manager()
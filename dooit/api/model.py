@@ -1,9 +1,12 @@
 import uuid
-from typing import Any, List, Literal, TypeVar
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, TypeVar
 from typing_extensions import Self
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.ext.declarative import declared_attr
-from sqlalchemy import inspect
+from sqlalchemy import FetchedValue, func, inspect, select, text
+from .hierarchy import below
 from .manager import manager
 
 
@@ -15,6 +18,15 @@ class BaseModel(DeclarativeBase):
     pass
 
 
+def set_children(model: Any, key: str, children: List[Any]) -> None:
+    """
+    Fill a child collection with rows loaded in bulk, unless it is already loaded
+    """
+
+    if key in inspect(model).unloaded:
+        set_committed_value(model, key, children)
+
+
 class BaseModelMixin:
     @declared_attr
     def __tablename__(cls):
@@ -35,10 +47,30 @@ class DooitModel(BaseModel, BaseModelMixin):
     # id: Mapped[int] = mapped_column(primary_key=True, default=generate_unique_id)
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     order_index: Mapped[int] = mapped_column(default=-1)
+    # ids from the top of the hierarchy down to this one, see `hierarchy`
+    path: Mapped[Optional[str]] = mapped_column(
+        server_default=FetchedValue(), server_onupdate=FetchedValue()
+    )
+
+    # bumped on every write through the ORM, see `__mapper_args__`
+    version: Mapped[int] = mapped_column(default=1, server_default=text("1"))
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        default=datetime.now, onupdate=datetime.now
+    )
+
+    @declared_attr.directive
+    def __mapper_args__(cls) -> Dict[str, Any]:
+        return {
+            # the path is written by triggers, after the inserted values are returned
+            "eager_defaults": False,
+            # updates and deletes of a row changed by another instance since
+            # it was loaded match nothing, instead of overwriting the change
+            "version_id_col": cls.__table__.c.version,
+        }
 
     @classmethod
     def comparable_fields(cls):
-        to_ignore = ["id", "order_index", "is_root"]
+        to_ignore = ["id", "order_index", "is_root", "path", "version", "updated_at"]
 
         comparable_fields = [
             column.name
@@ -56,21 +88,77 @@ class DooitModel(BaseModel, BaseModelMixin):
     def parent(self) -> Any:
         raise NotImplementedError  # pragma: no cover
 
+    def _get_path(self) -> str:
+        if self.path is None:
+            # rows only get a path once they are written
+            self.session.flush()
+
+        assert self.path is not None
+        return self.path
+
+    def _split_path(self, path: str) -> List[int]:
+        """
+        Ids of the models of the same kind above this one in `path`, from
+        the top, followed by its own id
+        """
+
+        raise NotImplementedError  # pragma: no cover
+
     @property
-    def nest_level(self):
+    def nest_level(self) -> int:
+        if self.path is not None:
+            return max(len(self._split_path(self.path)) - 1, 0)
+
+        # not written yet, so walk up the parents instead
         level = 0
-        parent = self.parent
+        with self.session.no_autoflush:
+            parent = self.parent
 
-        while (
-            parent
-            and isinstance(self, parent.__class__)
-            and not getattr(parent, "is_root", False)
-        ):
-            level += 1
-            parent = parent.parent
+            while (
+                parent
+                and isinstance(self, parent.__class__)
+                and not getattr(parent, "is_root", False)
+            ):
+                level += 1
+                parent = parent.parent
 
         return level
 
+    def ancestors(self) -> List[Self]:
+        """
+        Models of the same kind above this one, from the top
+        """
+
+        cls = self.__class__
+        ids = self._split_path(self._get_path())[:-1]
+        query = select(cls).where(cls.id.in_(ids))
+        loaded = {model.id: model for model in self.session.scalars(query)}
+
+        return [loaded[_id] for _id in ids]
+
+    def descendants(self) -> List[Self]:
+        """
+        Models of the same kind below this one at any depth, parents first
+        """
+
+        cls = self.__class__
+        query = select(cls).where(below(cls.path, self._get_path())).order_by(cls.path)
+        return list(self.session.scalars(query))
+
+    def descendant_count(self) -> int:
+        cls = self.__class__
+        query = select(func.count()).where(below(cls.path, self._get_path()))
+        return self.session.scalar(query) or 0
+
+    @classmethod
+    def changed_since(cls, since: datetime) -> List[Self]:
+        """
+        Models added or changed after `since`, oldest change first
+        """
+
+        query = select(cls).where(cls.updated_at > since).order_by(cls.updated_at)
+        return list(manager.session.scalars(query))
+
     @property
     def siblings(self) -> List[Any]:
         raise NotImplementedError  # pragma: no cover
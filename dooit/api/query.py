@@ -0,0 +1,99 @@
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Sequence
+from sqlalchemy import Select, and_, or_, select
+from .manager import manager
+from .todo import Todo
+from .workspace import Workspace
+
+# Rows fetched from the database at a time while streaming
+BATCH_SIZE = 500
+
+
+def todo_query(
+    workspaces: Sequence[int] = (),
+    status: Optional[str] = None,
+    due_after: Optional[datetime] = None,
+    due_before: Optional[datetime] = None,
+    tags: Sequence[str] = (),
+    min_urgency: Optional[int] = None,
+) -> Select:
+    """
+    Select todos along with the description of the workspace they belong to,
+    including the nested ones
+    """
+
+    top = select(Todo.id, Todo.parent_workspace_id.label("workspace_id")).where(
+        Todo.parent_workspace_id.is_not(None)
+    )
+    if workspaces:
+        top = top.where(Todo.parent_workspace_id.in_(workspaces))
+
+    tree = top.cte("todo_tree", recursive=True)
+    tree = tree.union_all(
+        select(Todo.id, tree.c.workspace_id).join(
+            tree, Todo.parent_todo_id == tree.c.id
+        )
+    )
+
+    query = (
+        select(Todo, Workspace.description)
+        .join(tree, Todo.id == tree.c.id)
+        .join(Workspace, Workspace.id == tree.c.workspace_id)
+        .order_by(Todo.id)
+    )
+
+    now = datetime.now()
+    if status == "completed":
+        query = query.where(Todo.pending == False)
+    elif status == "overdue":
+        query = query.where(Todo.pending == True, Todo.due < now)
+    elif status == "pending":
+        query = query.where(
+            Todo.pending == True, or_(Todo.due.is_(None), Todo.due >= now)
+        )
+
+    if due_after:
+        query = query.where(Todo.due >= due_after)
+
+    if due_before:
+        query = query.where(Todo.due <= due_before)
+
+    if tags:
+        # narrowed down to exact tags by `stream_todos`
+        query = query.where(
+            and_(*[Todo.description.contains(f"@{tag}") for tag in tags])
+        )
+
+    if min_urgency is not None:
+        query = query.where(Todo.urgency >= min_urgency)
+
+    return query
+
+
+def todo_as_dict(todo: Todo, workspace: str) -> Dict[str, Any]:
+    return dict(
+        id=todo.id,
+        description=todo.description,
+        workspace=workspace,
+        parent_todo_id=todo.parent_todo_id,
+        due=todo.due.isoformat() if todo.due else None,
+        effort=todo.effort,
+        recurrence=todo.recurrence.total_seconds() if todo.recurrence else None,
+        urgency=todo.urgency,
+        status=todo.status,
+        tags=todo.tags,
+    )
+
+
+def stream_todos(query: Select, tags: Sequence[str] = ()) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the todos selected by `todo_query` in batches, so that
+    memory use does not grow with the number of rows
+    """
+
+    tags = {f"@{tag}" for tag in tags}
+    result = manager.session.execute(query.execution_options(yield_per=BATCH_SIZE))
+
+    for todo, workspace in result:
+        if tags.issubset(todo.tags):
+            yield todo_as_dict(todo, workspace)
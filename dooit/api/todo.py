@@ -1,9 +1,13 @@
-from typing import TYPE_CHECKING, Optional, Union
+from collections import defaultdict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from typing import List
-from sqlalchemy import ForeignKey, select, nulls_last
+from sqlalchemy import ForeignKey, Index, delete, select, nulls_last
 from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
-from .model import DooitModel
+from .exceptions import ConcurrentEditError
+from .hierarchy import SEPARATOR, below
+from .model import DooitModel, set_children
 from .manager import manager
 
 
@@ -11,7 +15,22 @@ if TYPE_CHECKING:  # pragma: no cover
     from dooit.api.workspace import Workspace
 
 
+@lru_cache(maxsize=4096)
+def _split_tags(description: str) -> Tuple[str, ...]:
+    # tags are read on every render, descriptions rarely change
+    return tuple(i for i in description.split() if i[0] == "@")
+
+
 class Todo(DooitModel):
+    __table_args__ = (
+        Index("ix_todo_parent_workspace_id", "parent_workspace_id", "order_index"),
+        Index("ix_todo_parent_todo_id", "parent_todo_id", "order_index"),
+        Index("ix_todo_due", "due"),
+        Index("ix_todo_pending", "pending"),
+        Index("ix_todo_path", "path"),
+        Index("ix_todo_updated_at", "updated_at"),
+    )
+
     # id: Mapped[int] = mapped_column(primary_key=True, default=generate_unique_id)
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     order_index: Mapped[int] = mapped_column(default=-1)
@@ -58,11 +77,36 @@ class Todo(DooitModel):
     @classmethod
     def from_id(cls, _id: str) -> "Todo":
         _id = _id.lstrip("Todo_")
-        query = select(Todo).where(Todo.id == _id)
-        res = manager.session.execute(query).scalars().first()
+        res = manager.session.get(Todo, int(_id))
         assert res is not None
         return res
 
+    @classmethod
+    def load_subtree(cls, parent: Union["Workspace", "Todo"]) -> List["Todo"]:
+        """
+        Load all the todos under `parent` with a single query on their paths,
+        filling the `todos` collections on the way
+        """
+
+        if isinstance(parent, Todo):
+            path = parent._get_path()
+        else:
+            path = f"{parent.id}{SEPARATOR}"
+
+        query = select(Todo).where(below(Todo.path, path)).order_by(Todo.order_index)
+        todos = manager.session.execute(query).scalars().all()
+
+        children = defaultdict(list)
+        for todo in todos:
+            children[todo.parent_todo_id].append(todo)
+
+        top_level = parent.id if isinstance(parent, Todo) else None
+        set_children(parent, "todos", children[top_level])
+        for todo in todos:
+            set_children(todo, "todos", children.get(todo.id, []))
+
+        return list(todos)
+
     @property
     def parent(self) -> Union["Workspace", "Todo"]:
         assert self.parent_workspace or self.parent_todo
@@ -78,9 +122,13 @@ class Todo(DooitModel):
     def has_same_parent_kind(self) -> bool:
         return self.parent_todo is not None
 
+    def _split_path(self, path: str) -> List[int]:
+        # the path starts with the workspace
+        return [int(i) for i in path.split(SEPARATOR)[1:-1]]
+
     @property
     def tags(self) -> List[str]:
-        return [i for i in self.description.split() if i[0] == "@"]
+        return list(_split_tags(self.description))
 
     @property
     def status(self) -> str:
@@ -128,6 +176,26 @@ class Todo(DooitModel):
 
         manager.commit()
 
+    def drop(self) -> None:
+        # the subtree goes with a single statement, instead of loading every
+        # level for the ORM to cascade the delete
+        parent = self.parent
+        path = self._get_path()
+        options = {"synchronize_session": "fetch"}
+
+        # checked against the loaded version, as the ORM does for its deletes
+        self.session.flush()
+        query = delete(Todo).where(Todo.id == self.id, Todo.version == self.version)
+        if self.session.execute(query, execution_options=options).rowcount == 0:
+            # the objects are expired, and re-read on their next access
+            self.session.rollback()
+            raise ConcurrentEditError()
+
+        query = delete(Todo).where(below(Todo.path, path))
+        self.session.execute(query, execution_options=options)
+        self.session.expire(parent, ["todos"])
+        manager.commit()
+
     def add_todo(self) -> "Todo":
         todo = Todo(parent_todo=self)
         todo.save()
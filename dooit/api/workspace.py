@@ -1,8 +1,10 @@
-from typing import List, Optional, Union
-from sqlalchemy import ForeignKey, asc, select
+from collections import defaultdict
+from typing import List, Optional, Sequence, Union
+from sqlalchemy import ForeignKey, Index, asc, func, select
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..api.todo import Todo
-from .model import DooitModel
+from .hierarchy import SEPARATOR, below
+from .model import DooitModel, set_children
 from .manager import manager
 
 ModelType = Union["Workspace", "Todo"]
@@ -10,6 +12,12 @@ ModelTypeList = Union[List["Workspace"], List["Todo"]]
 
 
 class Workspace(DooitModel):
+    __table_args__ = (
+        Index("ix_workspace_parent_workspace_id", "parent_workspace_id", "order_index"),
+        Index("ix_workspace_path", "path"),
+        Index("ix_workspace_updated_at", "updated_at"),
+    )
+
     # id: Mapped[int] = mapped_column(primary_key=True, default=generate_unique_id)
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     order_index: Mapped[int] = mapped_column(default=-1)
@@ -55,11 +63,37 @@ class Workspace(DooitModel):
     @classmethod
     def from_id(cls, _id: str) -> "Workspace":
         _id = _id.lstrip("Workspace_")
-        query = select(Workspace).where(Workspace.id == _id)
-        res = manager.session.execute(query).scalars().first()
+        res = manager.session.get(Workspace, int(_id))
         assert res is not None
         return res
 
+    @classmethod
+    def load_subtree(cls, parent: "Workspace") -> List["Workspace"]:
+        """
+        Load all the workspaces under `parent` with a single query on their
+        paths, filling the `workspaces` collections on the way
+        """
+
+        workspaces: Sequence[Workspace] = []
+
+        # a root which isn't saved yet has nothing under it
+        if parent.id is not None:
+            query = (
+                select(Workspace)
+                .where(below(Workspace.path, parent._get_path()))
+                .order_by(Workspace.order_index)
+            )
+            workspaces = manager.session.execute(query).scalars().all()
+
+        children = defaultdict(list)
+        for workspace in workspaces:
+            children[workspace.parent_workspace_id].append(workspace)
+
+        for workspace in [parent, *workspaces]:
+            set_children(workspace, "workspaces", children[workspace.id])
+
+        return list(workspaces)
+
     @property
     def parent(self) -> Optional["Workspace"]:
         return self.parent_workspace
@@ -68,6 +102,12 @@ class Workspace(DooitModel):
     def has_same_parent_kind(self) -> bool:
         return self.parent is not None
 
+    def _split_path(self, path: str) -> List[int]:
+        ids = [int(i) for i in path.split(SEPARATOR)[:-1]]
+
+        # the root workspace is above every other one, but never shown
+        return ids if self.is_root else ids[1:]
+
     @property
     def siblings(self) -> List["Workspace"]:
         if not self.parent_workspace:
@@ -102,6 +142,18 @@ class Workspace(DooitModel):
         todo.save()
         return todo
 
+    def todo_count(self, pending: Optional[bool] = None) -> int:
+        """
+        Number of todos in the workspace at any depth, or only the pending
+        or the completed ones
+        """
+
+        query = select(func.count()).where(below(Todo.path, f"{self.id}{SEPARATOR}"))
+        if pending is not None:
+            query = query.where(Todo.pending == pending)
+
+        return manager.session.scalar(query) or 0
+
     def _add_sibling(self) -> "Workspace":
         workspace = Workspace(
             parent_workspace=self.parent_workspace,
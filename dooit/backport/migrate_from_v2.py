@@ -1,39 +1,25 @@
-import re
-from datetime import datetime, timedelta
-from typing import List, Optional, Tuple
-from yaml import safe_load
+from datetime import datetime
+from itertools import count
+from typing import Any, Dict, List, Optional
 from pathlib import Path
+import yaml
 from platformdirs import user_data_dir
+from sqlalchemy import func, insert, select
 from dooit.api import Todo, Workspace, manager
+from dooit.api.bulk import BATCH_SIZE, todo_values
 from dooit.utils.cli_logger import logger
 from dooit.utils.database import delete_all_data
 
-manager.connect()
-BASE_PATH = Path(user_data_dir("dooit"))
-operations = []
-
-
-def parse_recurrence(recurrence: str) -> timedelta:
-    DURATION_LEGEND = {
-        "m": "minute",
-        "h": "hour",
-        "d": "day",
-        "w": "week",
-    }
-
-    def split_duration(duration: str) -> Tuple[str, str]:
-        if re.match(r"^(\d+)[mhdw]$", duration):
-            return duration[-1], duration[:-1]
-        else:
-            return tuple()
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader
 
-    sign, frequency = split_duration(recurrence)
-    frequency = int(frequency)
-    return timedelta(**{f"{DURATION_LEGEND[sign]}s": frequency})
+BASE_PATH = Path(user_data_dir("dooit"))
 
 
-def parse_due(due: str) -> Optional[datetime]:
-    if due == "none":
+def parse_due(due: Optional[str]) -> Optional[datetime]:
+    if due is None or due == "none":
         return None
 
     due_float = float(due)
@@ -41,8 +27,16 @@ def parse_due(due: str) -> Optional[datetime]:
 
 
 class Migrator2to3:
+    """
+    Convert the v2 yaml file to rows which are inserted in a single
+    transaction, with their ids and order assigned up front
+    """
+
     old_location = BASE_PATH / "todo.yaml"
-    new_location = BASE_PATH / "dooit.db"
+
+    def __init__(self) -> None:
+        self.workspaces: List[Dict[str, Any]] = []
+        self.todos: List[Dict[str, Any]] = []
 
     @classmethod
     def check_for_old_data(cls):
@@ -53,7 +47,7 @@ class Migrator2to3:
 
     def load_old(self):
         with self.old_location.open() as f:
-            return safe_load(f)
+            return yaml.load(f, Loader=SafeLoader)
 
     def backup_old_config(self):
         logger.info("Moving old config to a backup file ...")
@@ -63,6 +57,10 @@ class Migrator2to3:
 
         logger.success("Backup successful")
 
+    def has_data(self) -> bool:
+        query = select(Workspace.id).where(Workspace.is_root == False)
+        return manager.session.scalars(query).first() is not None
+
     def migrate(self):
         logger.info("Checking for old data ...")
 
@@ -73,7 +71,7 @@ class Migrator2to3:
         logger.info("Found old data. Converting ...")
 
         try:
-            if self.new_location.exists():
+            if self.has_data():
                 confirm = logger.console.input(
                     "Database already exists. Do you want to overwrite it? (y/n): "
                 )
@@ -83,65 +81,108 @@ class Migrator2to3:
                     logger.error("Migration aborted")
                     return
 
-            data = self.load_old()
-            for workspace in data:
-                self.create_workspace(workspace)
+            data = self.load_old() or []
+            self.build_rows(data)
+            logger.info(
+                f"Read {len(self.workspaces)} workspaces "
+                f"and {len(self.todos)} todos, saving ..."
+            )
 
+            self.insert_rows()
             self.backup_old_config()
             logger.success("Successfully moved to new version. Happy todoing!")
         except Exception as e:
+            manager.session.rollback()
             logger.error(f"Error converting data: {e}")
 
     # ------------------------------------------------
 
-    def create_workspace(self, data, parent=None):
-        description = data.get("description")
-        child_workspaces = data.get("workspaces", [])
-        todos = data.get("todos", [])
-
-        workspace = Workspace(description=description, parent_workspace=parent)
-        workspace.save()
+    def build_rows(self, data: List) -> None:
+        root = Workspace._get_or_create_root()
+        if root.id is None:
+            manager.session.add(root)
+            manager.session.flush()
+
+        def next_ids(model):
+            return count((manager.session.scalar(select(func.max(model.id))) or 0) + 1)
+
+        self._workspace_ids = next_ids(Workspace)
+        self._todo_ids = next_ids(Todo)
+
+        for index, workspace in enumerate(data):
+            self.add_workspace(workspace, root.id, index)
+
+    def insert_rows(self) -> None:
+        session = manager.session
+        session.execute(insert(Workspace), self.workspaces)
+
+        # see `TodoImporter._insert`
+        query = insert(Todo).execution_options(render_nulls=True)
+        for start in range(0, len(self.todos), BATCH_SIZE):
+            batch = self.todos[start : start + BATCH_SIZE]
+            session.execute(query, batch)
+            logger.info(f"Saved {start + len(batch)}/{len(self.todos)} todos")
+
+        manager.commit()
+
+    def add_workspace(self, data, parent_id: int, order_index: int) -> None:
+        _id = next(self._workspace_ids)
+        self.workspaces.append(
+            dict(
+                id=_id,
+                description=data.get("description") or "",
+                parent_workspace_id=parent_id,
+                order_index=order_index,
+                is_root=False,
+            )
+        )
 
-        for child in child_workspaces:
-            self.create_workspace(child, parent=workspace)
+        for index, child in enumerate(data.get("workspaces") or []):
+            self.add_workspace(child, _id, index)
 
-        for child in todos:
-            self.create_todo(child, parent_workspace=workspace)
+        for index, child in enumerate(data.get("todos") or []):
+            self.add_todo(child, index, parent_workspace_id=_id)
 
-    def create_todo(self, data: List, parent_todo=None, parent_workspace=None):
+    def add_todo(
+        self,
+        data: List,
+        order_index: int,
+        parent_workspace_id: Optional[int] = None,
+        parent_todo_id: Optional[int] = None,
+    ) -> None:
         self_data = data[0]
         if len(data) == 1:
             children_data = []
         else:
             children_data = data[1]
 
-        description = self_data.get("description")
-        pending = self_data.get("status") != "COMPLETED"
-        urgency = self_data.get("urgency")
-        due = self_data.get("due")
-        effort = self_data.get("effort")
-        recurrence = self_data.get("recurrence")
-
-        todo = Todo(
-            parent_todo=parent_todo,
-            parent_workspace=parent_workspace,
-            description=description,
-            pending=pending,
-            urgency=urgency,
-            due=parse_due(due),
-            effort=int(effort) if effort else None,
-            recurrence=parse_recurrence(recurrence) if recurrence else None,
+        _id = next(self._todo_ids)
+        values = todo_values(
+            dict(
+                description=self_data.get("description"),
+                pending=self_data.get("status") != "COMPLETED",
+                urgency=self_data.get("urgency"),
+                due=parse_due(self_data.get("due")),
+                effort=self_data.get("effort"),
+                recurrence=self_data.get("recurrence"),
+            )
         )
-        todo.save()
-
-        for data in children_data:
-            self.create_todo(
-                data,
-                parent_todo=todo,
+        self.todos.append(
+            dict(
+                values,
+                id=_id,
+                order_index=order_index,
+                parent_workspace_id=parent_workspace_id,
+                parent_todo_id=parent_todo_id,
             )
+        )
+
+        for index, child in enumerate(children_data or []):
+            self.add_todo(child, index, parent_todo_id=_id)
 
 
 if __name__ == "__main__":
+    manager.connect()
     m = Migrator2to3()
     if m.check_for_old_data():
         m.migrate()
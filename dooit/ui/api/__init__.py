@@ -1,7 +1,7 @@
 from .dooit_api import DooitAPI
 from .plug import PluginManager
 from .event_handlers import subscribe, timer
-from .api_components.formatters import extra_formatter
+from .api_components.formatters import extra_formatter, pure_formatter
 from .api_components import (
     KeyManager,
     KeyBindType,
@@ -19,6 +19,7 @@ __all__ = [
     "VarManager",
     "Formatter",
     "extra_formatter",
+    "pure_formatter",
     "subscribe",
     "timer",
 ]
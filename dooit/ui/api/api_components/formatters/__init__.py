@@ -1,9 +1,12 @@
 from .formatter import Formatter
 from .formatter_store import FormatterStore
-from ._decorators import extra_formatter
+from .formatter_cache import FormatterCache
+from ._decorators import extra_formatter, pure_formatter
 
 __all__ = [
     "Formatter",
     "FormatterStore",
+    "FormatterCache",
     "extra_formatter",
+    "pure_formatter",
 ]
@@ -1,4 +1,8 @@
+from typing import Callable, Optional
+
 MUTLIPLE_FORMATTER_ATTR = "__extra_formatter"
+PURE_FORMATTER_ATTR = "__pure_formatter"
+FORMATTER_TTL_ATTR = "__formatter_ttl"
 
 
 def extra_formatter(func):
@@ -8,3 +12,22 @@ def extra_formatter(func):
 
     setattr(func, MUTLIPLE_FORMATTER_ATTR, True)
     return func
+
+
+def pure_formatter(func: Optional[Callable] = None, *, ttl: Optional[float] = None):
+    """
+    Decorator to mark a formatter whose output only depends on the value and model
+    it is called with, so that its results can be cached.
+
+    Formatters depending on the current time can pass a `ttl` (in seconds).
+    """
+
+    def decorator(func: Callable) -> Callable:
+        setattr(func, PURE_FORMATTER_ATTR, True)
+        setattr(func, FORMATTER_TTL_ATTR, ttl)
+        return func
+
+    if func is None:
+        return decorator
+
+    return decorator(func)
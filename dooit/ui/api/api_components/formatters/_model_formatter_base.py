@@ -1,5 +1,6 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
+from .formatter_cache import FormatterCache
 from .formatter_store import FormatterStore
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -7,12 +8,13 @@ if TYPE_CHECKING:  # pragma: no cover
 
 
 class ModelFormatterBase:
-    def __init__(self, api: "DooitAPI") -> None:
+    def __init__(self, api: "DooitAPI", cache: Optional[FormatterCache] = None) -> None:
         self.api = api
+        self.cache = cache
         self.setup_formatters()
 
     def get_formatter_store(self) -> FormatterStore:
-        return FormatterStore(self.trigger, self.api)
+        return FormatterStore(self.trigger, self.api, self.cache)
 
     def setup_formatters(self) -> None:  # pragma: no cover
         pass
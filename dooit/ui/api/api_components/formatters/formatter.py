@@ -1,6 +1,7 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict
 
 from .._base import ApiComponent
+from .formatter_cache import FormatterCache
 from .model_formatters import TodoFormatter, WorkspaceFormatter
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -9,6 +10,11 @@ if TYPE_CHECKING:  # pragma: no cover
 
 class Formatter(ApiComponent):
     def __init__(self, api: "DooitAPI") -> None:
-        self.todos = TodoFormatter(api)
-        self.workspaces = WorkspaceFormatter(api)
+        self.cache = FormatterCache()
+        self.todos = TodoFormatter(api, self.cache)
+        self.workspaces = WorkspaceFormatter(api, self.cache)
         self.app = api
+
+    def cache_info(self) -> Dict[str, int]:
+        """Hits, misses and size of the cache for pure formatters"""
+        return self.cache.info()
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Dict, Hashable, Optional, Tuple
+from rich.text import Text
+
+
+class FormatterCache:
+    """
+    Bounded LRU cache of cells formatted by pure formatters
+    """
+
+    def __init__(self, maxsize: int = 8192) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, Tuple[Text, Optional[float]]] = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Text]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires = entry
+            if expires is None or monotonic() < expires:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+            del self._entries[key]
+
+        self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value: Text, ttl: Optional[float] = None) -> None:
+        expires = None if ttl is None else monotonic() + ttl
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> Dict[str, int]:
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            size=len(self._entries),
+            maxsize=self.maxsize,
+        )
@@ -4,7 +4,12 @@ from dataclasses import dataclass
 
 from rich.text import Text
 from dooit.api.workspace import ModelType
-from dooit.ui.api.api_components.formatters._decorators import MUTLIPLE_FORMATTER_ATTR
+from dooit.ui.api.api_components.formatters._decorators import (
+    FORMATTER_TTL_ATTR,
+    MUTLIPLE_FORMATTER_ATTR,
+    PURE_FORMATTER_ATTR,
+)
+from dooit.ui.api.api_components.formatters.formatter_cache import FormatterCache
 
 if TYPE_CHECKING:  # pragma: no cover
     from dooit.ui.api.dooit_api import DooitAPI
@@ -19,9 +24,35 @@ class FormatterFunc:
     disabled: bool = False
 
 
+BoundFormatter = Tuple[Callable, Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class FormatterPipeline:
+    """
+    Enabled formatters with their extra arguments resolved, in calling order
+    """
+
+    type1: Tuple[BoundFormatter, ...] = ()
+    type2: Tuple[BoundFormatter, ...] = ()
+    pure: bool = True
+    ttl: Optional[float] = None
+
+    @property
+    def cacheable(self) -> bool:
+        """
+        Whether the output can be kept until the value or the formatters change
+        """
+
+        # without formatters, values are shown as they are
+        return self.pure or not (self.type1 or self.type2)
+
+
 def trigger_refresh(func: Callable) -> Callable:
     def wrapper(self: "FormatterStore", *args, **kwargs):
         res = func(self, *args, **kwargs)
+        self.generation += 1
+        self.pipeline = self._compile()
         self.trigger()
         return res
 
@@ -29,10 +60,18 @@ def trigger_refresh(func: Callable) -> Callable:
 
 
 class FormatterStore:
-    def __init__(self, trigger: Callable, api: "DooitAPI") -> None:
+    def __init__(
+        self,
+        trigger: Callable,
+        api: "DooitAPI",
+        cache: Optional[FormatterCache] = None,
+    ) -> None:
         self.formatters = dict()
         self.trigger = trigger
         self.api = api
+        self.cache = cache
+        self.generation = 0
+        self.pipeline = FormatterPipeline()
 
     @trigger_refresh
     def add(self, func: Callable, id: Optional[str] = None) -> str:
@@ -89,36 +128,72 @@ class FormatterStore:
     def _get_function_params(self, func: Callable) -> List[str]:
         return list(func.__code__.co_varnames)
 
-    def format_value(self, value: Any, model: ModelType) -> Text:
+    def _bind(self, func: Callable) -> BoundFormatter:
         params = dict(api=self.api)
+        extra_args = {
+            param: params[param]
+            for param in self._get_function_params(func)
+            if param in params
+        }
+
+        return func, extra_args
+
+    def _compile(self) -> FormatterPipeline:
+        functions = self.type1_formatter_functions + self.type2_formatter_functions
+        ttls = [
+            ttl
+            for func in functions
+            if (ttl := getattr(func, FORMATTER_TTL_ATTR, None)) is not None
+        ]
 
-        def get_extra_args(func: Callable) -> Dict[str, Any]:
-            func_params = self._get_function_params(func)
-            extra_args = {}
+        return FormatterPipeline(
+            type1=tuple(map(self._bind, reversed(self.type1_formatter_functions))),
+            type2=tuple(map(self._bind, reversed(self.type2_formatter_functions))),
+            pure=bool(functions)
+            and all(hasattr(func, PURE_FORMATTER_ATTR) for func in functions),
+            ttl=min(ttls, default=None),
+        )
 
-            for param in func_params:
-                if param in params:
-                    extra_args[param] = params[param]
+    def format_value(self, value: Any, model: ModelType) -> Text:
+        if self.cache is None or not self.pipeline.pure or model.id is None:
+            return self._format_value(value, model)
 
-            return extra_args
+        # formatters commonly pick colors from the theme, which can be swapped
+        theme = id(self.api.vars.theme)
+        key = (id(self), self.generation, theme, value, model.uuid)
+        try:
+            res = self.cache.get(key)
+        except TypeError:  # unhashable value
+            return self._format_value(value, model)
 
-        res = None
+        if res is None:
+            res = self._format_value(value, model)
+            self.cache.set(key, res, self.pipeline.ttl)
 
-        for func in reversed(self.type1_formatter_functions):
-            res = func(value, model, **get_extra_args(func))
+        return res
 
-            if isinstance(res, Text):
-                res = res.markup
+    def _format_value(self, value: Any, model: ModelType) -> Text:
+        pipeline = self.pipeline
+        res = None
 
+        for func, extra_args in pipeline.type1:
+            res = func(value, model, **extra_args)
             if res is not None:
                 break
 
+        if not pipeline.type2 and isinstance(res, Text) and res.plain:
+            # Nothing left to pass the markup to, so skip the round trip
+            return res
+
+        if isinstance(res, Text):
+            res = res.markup
+
         if res is None:
             res = str(value)
 
         value = res
-        for func in reversed(self.type2_formatter_functions):
-            res = func(value, model, **get_extra_args(func))
+        for func, extra_args in pipeline.type2:
+            res = func(value, model, **extra_args)
             if res is not None:
                 if isinstance(res, Text):  # pragma: no cover
                     res = res.markup
@@ -13,6 +13,7 @@ class TodoFormatter(ModelFormatterBase):
 
     def trigger(self) -> None:
         for widget in self.api.app.screen.query(TodosTree):
+            widget.column_widths.reset()
             widget.force_refresh()
 
 
@@ -22,4 +23,5 @@ class WorkspaceFormatter(ModelFormatterBase):
 
     def trigger(self) -> None:
         for widget in self.api.app.screen.query(WorkspacesTree):
+            widget.column_widths.reset()
             widget.force_refresh()
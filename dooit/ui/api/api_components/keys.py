@@ -1,7 +1,8 @@
+import re
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from collections import defaultdict
-from typing import Callable, List, Optional, Tuple, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 from ._base import ApiComponent
 from dooit.ui.api.events import ModeType
@@ -20,6 +21,28 @@ class DooitFunction:
         self.description = self.description.strip("\n")
 
 
+@dataclass
+class KeyNode:
+    """
+    Node of the prefix tree of key tokens, for a single mode
+    """
+
+    children: Dict[str, "KeyNode"] = field(default_factory=dict)
+    function: Optional[DooitFunction] = None
+
+
+def split_key(key: str) -> List[str]:
+    """
+    Split a keybind into the keys to press, e.g. `<ctrl+s>gg` into
+    `ctrl+s`, `g` and `g`
+    """
+
+    return [
+        token[1:-1] if len(token) > 1 else token
+        for token in re.findall(r"<[^<>]+>|.", key)
+    ]
+
+
 class KeyMatchType(Enum):
     NoMatchFound = "NoMatchFound"
     MultipleMatchFound = "MultipleMatchFound"
@@ -47,9 +70,14 @@ class KeyMatch:
 class KeyManager(ApiComponent):
     def __init__(self, get_mode: Callable) -> None:
         self.keybinds: KeyBindType = defaultdict(lambda: defaultdict(lambda: None))
+        self.tries: Dict[str, KeyNode] = defaultdict(KeyNode)
         self._inputs: List[str] = []
+        self._node: Optional[KeyNode] = None
         self.get_mode = get_mode
 
+        # seconds to wait for the next key of a chord, `None` waits forever
+        self.timeout: Optional[float] = None
+
     @property
     def groups(self) -> List[str]:
         return list(
@@ -71,9 +99,14 @@ class KeyManager(ApiComponent):
         description: Optional[str],
         group: str,
     ) -> None:
-        self.keybinds[mode][key] = DooitFunction(
-            callback, description or callback.__doc__ or "", group
-        )
+        function = DooitFunction(callback, description or callback.__doc__ or "", group)
+        self.keybinds[mode][key] = function
+
+        node = self.tries[mode]
+        for token in split_key(key):
+            node = node.children.setdefault(token, KeyNode())
+
+        node.function = function
 
     def set(
         self,
@@ -90,38 +123,46 @@ class KeyManager(ApiComponent):
 
     @property
     def input(self) -> str:
-        formatted = ""
-        for i in self._inputs:
-            if len(i) > 1:
-                formatted += f"<{i}>"
-            else:
-                formatted += i
-
-        return formatted
+        return "".join(f"<{i}>" if len(i) > 1 else i for i in self._inputs)
 
     def clear_input(self):
         self._inputs.clear()
-
-    def _find_matched_functions(self) -> List[DooitFunction]:
-        keybinds = self.keybinds[self.get_mode()].items()
-        return [func for key, func in keybinds if key.startswith(self.input) and func]
+        self._node = None
 
     def search_for_key(self) -> KeyMatch:
-        matched = self._find_matched_functions()
-        if not matched:
+        node = self._node
+        if node is None:
             self.clear_input()
             return KeyMatch.no_match()
 
-        if len(matched) > 1 or self.input not in self.keybinds[self.get_mode()]:
+        if node.children:
             return KeyMatch.multiple_match()
 
         self.clear_input()
-        return KeyMatch.match_found(matched[0])
+        assert node.function is not None
+        return KeyMatch.match_found(node.function)
+
+    def flush_input(self) -> KeyMatch:
+        """
+        Stop waiting for the rest of a chord, matching the keys pressed so far
+        only if they are a keybind on their own
+        """
+
+        node = self._node
+        self.clear_input()
+
+        if node is None or node.function is None:
+            return KeyMatch.no_match()
+
+        return KeyMatch.match_found(node.function)
 
     def register_key(self, key: str) -> KeyMatch:
         if key == "escape":
             self.clear_input()
             return KeyMatch.no_match()
 
+        node = self._node or self.tries[self.get_mode()]
         self._inputs.append(key)
+        self._node = node.children.get(key)
+
         return self.search_for_key()
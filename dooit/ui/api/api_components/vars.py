@@ -2,7 +2,7 @@ from typing import TYPE_CHECKING, Optional
 
 from textual.widgets import ContentSwitcher
 
-from dooit.api import Workspace
+from dooit.api import Workspace, manager
 from dooit.api.theme import DooitThemeBase
 from dooit.api.todo import Todo
 from dooit.ui.widgets.trees import WorkspacesTree, TodosTree
@@ -45,6 +45,31 @@ class VarManager(ApiComponent):
     def show_confirm(self, value: bool):
         self._show_confirm = value
 
+    @property
+    def db_profile(self) -> str:
+        return manager.profile
+
+    @db_profile.setter
+    def db_profile(self, value: str):
+        manager.set_profile(value)
+
+    @property
+    def commit_delay(self) -> Optional[float]:
+        return manager.commit_delay
+
+    @commit_delay.setter
+    def commit_delay(self, value: Optional[float]):
+        manager.flush_pending()
+        manager.commit_delay = value
+
+    @property
+    def key_timeout(self) -> Optional[float]:
+        return self.api.keys.timeout
+
+    @key_timeout.setter
+    def key_timeout(self, value: Optional[float]):
+        self.api.keys.timeout = value
+
     @property
     def mode(self) -> str:
         return self.api.app.dooit_mode
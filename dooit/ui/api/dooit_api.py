@@ -1,13 +1,22 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List, Optional
+from textual.timer import Timer
+from dooit.api import Todo, Workspace
+from dooit.api.fts import SEARCH_LIMIT, SearchResult, search
 from dooit.ui.api.events import BarNotification, NotificationType
 from dooit.ui.api.plug import PluginManager
-from .events import DooitEvent, SwitchTab, QuitApp
+from .events import (
+    DooitEvent,
+    SwitchTab,
+    QuitApp,
+    StartGlobalSearch,
+)
 from dooit.ui.widgets import ModelTree
 from dooit.ui.widgets.trees import TodosTree
 from dooit.utils import CssManager
 
 from .api_components import (
     KeyManager,
+    KeyMatch,
     KeyMatchType,
     LayoutManager,
     Formatter,
@@ -34,6 +43,7 @@ class DooitAPI:
         self.bar = BarManager(self)
         self.vars = VarManager(self)
         self.dashboard = DashboardManager(self.app)
+        self._chord_timer: Optional[Timer] = None
 
         self.css.refresh_css()
 
@@ -49,6 +59,10 @@ class DooitAPI:
         self.app.bar_switcher.switch_to_notification(BarNotification(message, level))
 
     async def handle_key(self, key: str) -> None:
+        if self._chord_timer is not None:
+            self._chord_timer.stop()
+            self._chord_timer = None
+
         keymatch = self.keys.register_key(key)
 
         if keymatch.match_type == KeyMatchType.NoMatchFound:
@@ -56,8 +70,22 @@ class DooitAPI:
             return
 
         if keymatch.match_type == KeyMatchType.MultipleMatchFound:
+            if self.keys.timeout is not None:
+                self._chord_timer = self.app.set_timer(
+                    self.keys.timeout, self._chord_timed_out
+                )
             return
 
+        self._run_keymatch(keymatch)
+
+    def _chord_timed_out(self) -> None:
+        self._chord_timer = None
+
+        keymatch = self.keys.flush_input()
+        if keymatch.match_type == KeyMatchType.MatchFound:
+            self._run_keymatch(keymatch)
+
+    def _run_keymatch(self, keymatch: KeyMatch) -> None:
         assert keymatch.function is not None
         try:
             keymatch.function.callback()
@@ -168,6 +196,58 @@ class DooitAPI:
         """Start sorting the siblings of the highlighted item"""
         self.focused.start_sort()
 
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> List[SearchResult]:
+        """Todos and workspaces of every workspace matching the query, best first"""
+        return search(query, limit)
+
+    def start_global_search(self):
+        """Search todos and workspaces in every workspace"""
+        self.app.screen.post_message(
+            StartGlobalSearch(lambda model: self.app.call_later(self.go_to, model))
+        )
+
+    async def go_to(self, model: SearchResult) -> None:
+        """Highlight a todo or workspace, expanding the items above it"""
+
+        todos: List[Todo] = []
+        node = model
+        while isinstance(node, Todo):
+            todos.insert(0, node)
+            node = node.parent
+
+        assert isinstance(node, Workspace)
+        workspace = node
+
+        workspaces: List[Workspace] = []
+        parent = workspace.parent_workspace
+        while parent is not None and not parent.is_root:
+            workspaces.insert(0, parent)
+            parent = parent.parent_workspace
+
+        workspaces_tree = self.app.workspace_tree
+        for parent in workspaces:
+            workspaces_tree._expand_node(parent.uuid)
+        workspaces_tree.highlight_id(workspace.uuid)
+
+        if not todos:
+            workspaces_tree.focus()
+            return
+
+        # the screens import this module
+        from dooit.ui.screens import MainScreen
+
+        # make sure the todos are shown before highlighting one of them
+        screen = self.app.screen
+        assert isinstance(screen, MainScreen)
+        await screen.show_todos(workspace)
+
+        todos_tree = self.vars.todos_tree
+        assert todos_tree is not None
+        for parent in todos[:-1]:
+            todos_tree._expand_node(parent.uuid)
+        todos_tree.highlight_id(model.uuid)
+        todos_tree.focus()
+
     def toggle_complete(self):
         """Toggle the completion of the todo"""
         if isinstance(self.focused, TodosTree):
@@ -2,6 +2,7 @@ from .events import (
     DooitEvent,
     Startup,
     StartSearch,
+    StartGlobalSearch,
     StartSort,
     ShowConfirm,
     ModeChanged,
@@ -31,6 +32,7 @@ __all__ = [
     "DooitEvent",
     "Startup",
     "StartSearch",
+    "StartGlobalSearch",
     "StartSort",
     "ShowConfirm",
     "SpawnHelp",
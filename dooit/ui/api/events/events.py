@@ -90,6 +90,16 @@ class StartSearch(DooitEvent):
         self.callback = callback
 
 
+class StartGlobalSearch(DooitEvent):
+    """
+    Emitted when user wants to search every workspace
+    """
+
+    def __init__(self, callback: Callable) -> None:
+        super().__init__()
+        self.callback = callback
+
+
 class StartSort(DooitEvent):
     """
     Emitted when user wants to sort
@@ -11,6 +11,7 @@ from dooit.ui.api.events import (
     ModeChanged,
     ShowConfirm,
     StartSearch,
+    StartGlobalSearch,
     StartSort,
     TodoDescriptionChanged,
     TodoDueChanged,
@@ -74,7 +75,7 @@ class MainScreen(BaseScreen):
             return True
 
         if self.app.bar_switcher.is_focused:
-            await self.app.bar_switcher.handle_keypress(event.key)
+            await self.app.bar_switcher.handle_keypress(self.resolve_key(event))
             return True
 
         key = self.resolve_key(event)
@@ -99,6 +100,11 @@ class MainScreen(BaseScreen):
         self.app.bar_switcher.switch_to_search(event.callback)
         self.post_message(ModeChanged("SEARCH"))
 
+    @on(StartGlobalSearch)
+    def start_global_search(self, event: StartGlobalSearch):
+        self.app.bar_switcher.switch_to_global_search(event.callback)
+        self.post_message(ModeChanged("SEARCH"))
+
     @on(StartSort)
     def start_sort(self, event: StartSort):
         self.app.bar_switcher.switch_to_sort(event.model, event.callback)
@@ -111,8 +117,15 @@ class MainScreen(BaseScreen):
 
     @on(WorkspaceSelected)
     async def workspace_selected(self, event: WorkspaceSelected):
+        await self.show_todos(event.workspace)
+
+    async def show_todos(self, workspace: Workspace) -> None:
+        """
+        Show the todos tree of `workspace`, adding it the first time
+        """
+
         switcher = self.query_one("#todo_switcher", expect_type=ContentSwitcher)
-        tree = TodosTree(event.workspace)
+        tree = TodosTree(workspace)
 
         if not switcher.query(f"#{tree.id}"):
             await switcher.add_content(tree, set_current=True)
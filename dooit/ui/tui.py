@@ -11,6 +11,7 @@ from dooit.ui.widgets.trees import WorkspacesTree
 from dooit.ui.screens import MainScreen, HelpScreen
 from dooit.ui.widgets.trees.model_tree import ModelTree
 from dooit.utils import CssManager
+from dooit.utils.loop_monitor import LoopMonitor
 from .api import DooitAPI
 from ..api import manager
 
@@ -38,14 +39,17 @@ class Dooit(App):
         self,
         db_path: Optional[str] = None,
         config: Optional[Path] = None,
+        db_profile: Optional[str] = None,
     ):
         super().__init__(watch_css=True)
         self.dooit_mode: ModeType = "NORMAL"
         self.config = config
-        manager.connect(db_path)
+        self.loop_monitor = LoopMonitor(on_stall=self.log_stall)
+        manager.connect(db_path, db_profile)
 
     async def base_setup(self):
         self.api = DooitAPI(self)
+        manager.on_commit_error = lambda e: self.api.notify(str(e), "error")
         self.api.plugin_manager.scan()
         self.post_message(Startup())
         self.post_message(ModeChanged("NORMAL"))
@@ -55,9 +59,19 @@ class Dooit(App):
         self.set_interval(1, self.poll_dooit_db)
 
     async def on_mount(self):
+        if "devtools" in self.features:
+            self.loop_monitor.start()
+
         await self.base_setup()
         await self.setup_poller()
 
+    def on_unmount(self) -> None:
+        # however the app exits, a delayed commit isn't left behind
+        manager.flush_pending()
+
+    def log_stall(self, lag: float) -> None:  # pragma: no cover
+        self.log.warning(f"Event loop stalled for {lag * 1000:.0f}ms")
+
     async def action_quit(self) -> None:
         self.post_message(ShutDown())
         return await super().action_quit()
@@ -78,13 +92,12 @@ class Dooit(App):
         return self.dooit_mode
 
     async def poll_dooit_db(self):  # pragma: no cover
-        def refresh_all_trees():
-            trees = self.screen.query(ModelTree)
-            for tree in trees:
-                tree.force_refresh()
+        changes = await manager.poll_changes_async()
+        if not changes:
+            return
 
-        if manager.has_changed():
-            refresh_all_trees()
+        for tree in self.screen.query(ModelTree):
+            tree.apply_changes(changes)
 
     @on(DooitEvent)
     def global_message(self, event: DooitEvent):
@@ -95,6 +108,8 @@ class Dooit(App):
     @on(ShutDown)
     def shutdown(self, _: ShutDown):
         self.api.css.cleanup()
+        self.loop_monitor.stop()
+        self.log.info(self.loop_monitor.report())
 
     @on(ModeChanged)
     def change_status(self, event: ModeChanged):
@@ -1,6 +1,7 @@
 from .bar_switcher import BarSwitcher
 from .status_bar import StatusBar, StatusBarWidget
 from .search_bar import SearchBar
+from .global_search_bar import GlobalSearchBar
 from .confirm_bar import ConfirmBar
 from .sort_bar import SortBar
 
@@ -8,6 +9,7 @@ __all__ = [
     "BarSwitcher",
     "StatusBar",
     "SearchBar",
+    "GlobalSearchBar",
     "StatusBarWidget",
     "ConfirmBar",
     "SortBar",
@@ -7,6 +7,7 @@ from dooit.ui.api.events.events import BarNotification
 from dooit.ui.widgets.bars._base import BarBase
 from .status_bar import StatusBar
 from .search_bar import SearchBar
+from .global_search_bar import GlobalSearchBar
 from .confirm_bar import ConfirmBar
 from .notification_bar import NotificationBar
 from .sort_bar import SortBar
@@ -61,6 +62,14 @@ class BarSwitcher(ContentSwitcher):
             set_current=True,
         )
 
+    def switch_to_global_search(self, callback: Callable):
+        global_search_bar = GlobalSearchBar(callback)
+        self.add_content(
+            widget=global_search_bar,
+            id="global_search_bar",
+            set_current=True,
+        )
+
     def switch_to_confirm(self, callback: Callable):
         confirm_bar = ConfirmBar(callback)
         self.add_content(
@@ -0,0 +1,3 @@
+from .bar import GlobalSearchBar
+
+__all__ = ["GlobalSearchBar"]
@@ -0,0 +1,58 @@
+from typing import Callable, List
+from rich.console import RenderableType
+from rich.text import Text
+from dooit.api.fts import SearchResult, search
+from .._base import BarBase
+from ...inputs._input import Input
+
+
+class GlobalSearchBar(BarBase):
+    """
+    Search the descriptions of every todo and workspace, calling back with
+    the selected result
+    """
+
+    COMPONENT_CLASSES = {
+        "option-highlighted",
+    }
+
+    def __init__(self, callback: Callable, *args, **kwargs):
+        super().__init__(callback, *args, **kwargs)
+        self._search = Input(value="?")
+        self._search.is_editing = True
+        self.results: List[SearchResult] = []
+        self.selected = 0
+
+    def perform_action(self, cancel: bool):
+        if not cancel and self.results:
+            self.callback(self.results[self.selected])
+
+    async def handle_keypress(self, key: str) -> None:
+        if key == "enter":
+            return self.dismiss(cancel=False)
+
+        if key == "escape":
+            return self.dismiss(cancel=True)
+
+        if key in ("tab", "down"):
+            self.selected = min(self.selected + 1, max(len(self.results) - 1, 0))
+        elif key in ("shift+tab", "up"):
+            self.selected = max(self.selected - 1, 0)
+        else:
+            self._search.keypress(key)
+            self.results = search(self._search.value[1:])
+            self.selected = 0
+
+        self.refresh()
+
+    def render(self) -> RenderableType:
+        text = Text(self._search.draw())
+        if self.results:
+            result = self.results[self.selected]
+            text.append(f"  {self.selected + 1}/{len(self.results)} ")
+            text.append(
+                result.description,
+                style=self.get_component_rich_style("option-highlighted"),
+            )
+
+        return text
@@ -1,10 +1,12 @@
 from .base_renderer import BaseRenderer
+from .lazy_prompt import LazyPrompt
 from .todo_renderer import TodoRender
 from .workspace_renderer import WorkspaceRender
 
 
 __all__ = [
     "BaseRenderer",
+    "LazyPrompt",
     "TodoRender",
     "WorkspaceRender",
 ]
@@ -1,12 +1,17 @@
-from typing import TYPE_CHECKING, Generic, List, TypeVar, Union
-from rich.console import RenderableType
+from math import ceil
+from typing import TYPE_CHECKING, Generic, List, Optional, Tuple, TypeVar, Union
 from rich.table import Table
+from sqlalchemy import inspect
 from dooit.api import Todo, Workspace
 from ..inputs.simple_input import SimpleInput
+from .lazy_prompt import LazyPrompt
 
 ModelType = TypeVar("ModelType", bound=Union[Todo, Workspace])
 
 if TYPE_CHECKING:  # pragma: no cover
+    from dooit.ui.api.api_components.formatters.formatter_store import (
+        FormatterPipeline,
+    )
     from dooit.ui.widgets.trees.model_tree import ModelTree
 
 
@@ -16,12 +21,22 @@ class BaseRenderer(Generic[ModelType]):
     def __init__(self, model: ModelType, tree: "ModelTree"):
         self._model = model
         self.tree = tree
+        self._prompt: Optional[LazyPrompt] = None
         self.post_init()
 
     def post_init(self):  # pragma: no cover
         pass
 
     def matches_filter(self, filter: str) -> bool:
+        """
+        Whether the row matches the search `filter`, from the tree's search
+        index while a search is on
+        """
+
+        tree = self.tree
+        if tree.filter_refresh and self.id in tree.search_index.descriptions:
+            return self.id in tree.search_index.search(filter)
+
         return filter in self.model.description
 
     def _get_component(self, component: str) -> SimpleInput:
@@ -31,13 +46,95 @@ class BaseRenderer(Generic[ModelType]):
     def id(self) -> str:
         return self._model.uuid
 
+    @property
+    def nest_level(self) -> int:
+        # worked out by the tree while flattening, instead of walking the parents
+        return self.tree.node_depth(self.id)
+
     @property
     def table_layout(self) -> List:
         return self.tree.render_layout
 
     @property
-    def prompt(self) -> RenderableType:
-        return self.make_renderable()
+    def prompt(self) -> LazyPrompt:
+        """
+        Prompt for the row, replaced once the key it was built with changes,
+        or once it expired
+        """
+
+        prompt = self._prompt
+        if prompt is None or (prompt.is_built and self._is_stale(prompt)):
+            prompt = self._prompt = LazyPrompt(self)
+
+        return prompt
+
+    def _is_stale(self, prompt: LazyPrompt) -> bool:
+        if prompt.is_expired:
+            return True
+
+        key = self.get_prompt_key()
+        return key is None or prompt.key != key
+
+    def _get_pipelines(self) -> List["FormatterPipeline"]:
+        formatter = self.tree.formatter
+        return [getattr(formatter, item.value).pipeline for item in self.table_layout]
+
+    def get_prompt_ttl(self) -> Optional[float]:
+        """
+        Seconds the row can be shown for, as the formatters with a `ttl` allow
+        """
+
+        ttls = [p.ttl for p in self._get_pipelines() if p.ttl is not None]
+        return min(ttls, default=None)
+
+    def get_prompt_key(self) -> Optional[Tuple]:
+        """
+        Everything the rendered row depends on, or `None` if it must be
+        rendered again, as the model has unsaved attributes or a formatter
+        isn't pure
+        """
+
+        if not all(pipeline.cacheable for pipeline in self._get_pipelines()):
+            return None
+
+        state = inspect(self.model)
+        if expired := state.expired_attributes.intersection(
+            state.mapper.column_attrs.keys()
+        ):
+            # loads all the expired columns at once
+            getattr(self.model, next(iter(expired)))
+
+        if state.modified:
+            return None
+
+        formatter = self.tree.formatter
+        columns = tuple(state.dict.get(attr.key) for attr in state.mapper.column_attrs)
+        cells = []
+
+        for item in self.table_layout:
+            attr = item.value
+            component = self._get_component(attr)
+            cells.append(
+                (
+                    attr,
+                    component.model_value,
+                    component.render(),
+                    getattr(formatter, attr).generation,
+                    self._get_max_width(attr),
+                )
+            )
+
+        # formatters commonly pick colors from the theme, which can be swapped
+        theme = id(self.tree.api.vars.theme)
+        return columns, self.nest_level, self.editing, theme, tuple(cells)
+
+    def estimate_height(self, width: int) -> int:
+        """
+        Height of the row at `width`, assuming only the description wraps
+        """
+
+        description = self.description.render()
+        return max(1, ceil(len(description) / max(width, 1)))
 
     @property
     def model(self) -> ModelType:
@@ -61,7 +158,9 @@ class BaseRenderer(Generic[ModelType]):
         table = Table.grid(expand=True, padding=(0, 1), pad_edge=True)
         row = []
 
-        if nest := self.model.nest_level:
+        self.tree.column_widths.update(self.id)
+
+        if nest := self.nest_level:
             table.add_column("padding", width=2 * nest)
             row.append("")
 
@@ -69,9 +168,6 @@ class BaseRenderer(Generic[ModelType]):
             attr = item.value
             component = self._get_component(attr)
 
-            if len(component.render()) > self._get_max_width(attr):
-                self.tree.get_column_width.cache_clear()
-
             if component.is_editing:
                 rendered = component.render()
             else:
@@ -99,9 +195,12 @@ class BaseRenderer(Generic[ModelType]):
         return True
 
     def stop_edit(self):
-        getattr(self, self.editing).stop_edit()
-        self.tree.get_column_width.cache_clear()
-        self.editing = ""
+        try:
+            getattr(self, self.editing).stop_edit()
+        finally:
+            # leave edit mode even if the value couldn't be saved
+            self.tree.column_widths.update(self.id)
+            self.editing = ""
 
     def handle_keypress(self, key: str) -> bool:
         getattr(self, self.editing).keypress(key)
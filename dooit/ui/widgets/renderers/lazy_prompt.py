@@ -0,0 +1,89 @@
+from time import monotonic
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from textual.css.styles import RulesMap
+from textual.selection import Selection
+from textual.strip import Strip
+from textual.style import Style
+from textual.visual import RichVisual, Visual
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .base_renderer import BaseRenderer
+
+
+class LazyPrompt(Visual):
+    """
+    Option prompt which builds the renderer's table only when it is drawn
+
+    Until then, its height is estimated from the description so that the
+    option list can be laid out without rendering every row
+    """
+
+    def __init__(self, renderer: "BaseRenderer") -> None:
+        self.renderer = renderer
+        self.key: Optional[Tuple] = None
+        # when formatters with a `ttl` want the row formatted again
+        self.expires: Optional[float] = None
+        self._visual: Optional[RichVisual] = None
+        self._heights: Dict[int, int] = {}
+
+    @property
+    def is_built(self) -> bool:
+        return self._visual is not None
+
+    @property
+    def is_expired(self) -> bool:
+        return self.expires is not None and monotonic() >= self.expires
+
+    @property
+    def visual(self) -> RichVisual:
+        if self._visual is None:
+            renderable = self.renderer.make_renderable()
+            self.key = self.renderer.get_prompt_key()
+            if (ttl := self.renderer.get_prompt_ttl()) is not None:
+                self.expires = monotonic() + ttl
+            self._visual = RichVisual(self.renderer.tree, renderable)
+
+        return self._visual
+
+    def build(self, rules: RulesMap, width: int) -> int:
+        """
+        Build the table and return its actual height at `width`
+        """
+
+        if width not in self._heights or not self.is_built:
+            self._heights[width] = self.visual.get_height(rules, width)
+
+        return self._heights[width]
+
+    def get_optimal_width(self, rules: RulesMap, container_width: int) -> int:
+        return self.visual.get_optimal_width(rules, container_width)
+
+    def get_height(self, rules: RulesMap, width: int) -> int:
+        if not self.is_built:
+            return self.renderer.estimate_height(width)
+
+        return self.build(rules, width)
+
+    def render_strips(
+        self,
+        rules: RulesMap,
+        width: int,
+        height: Optional[int],
+        style: Style,
+        selection: Optional[Selection] = None,
+        selection_style: Optional[Style] = None,
+        post_style: Optional[Style] = None,
+    ) -> List[Strip]:
+        estimated = self.get_height(rules, width)
+        if self.build(rules, width) != estimated:
+            self.renderer.tree.remeasure_prompts()
+
+        return self.visual.render_strips(
+            rules,
+            width,
+            height,
+            style,
+            selection,
+            selection_style,
+            post_style,
+        )
@@ -0,0 +1,92 @@
+from collections import Counter
+from typing import Callable, Dict, Iterable
+
+
+class ColumnWidths:
+    """
+    Multiset of the column widths of the displayed rows, so that the widest
+    cell of a column is known without measuring every row again
+    """
+
+    def __init__(self, measure: Callable[[str, str], int]) -> None:
+        self._measure = measure
+        self._rows: Dict[str, Dict[str, int]] = {}
+        self._counts: Dict[str, Counter] = {}
+        self._max: Dict[str, int] = {}
+
+    def __contains__(self, row_id: object) -> bool:
+        return row_id in self._rows
+
+    def get(self, attr: str) -> int:
+        """
+        Width of the widest cell of `attr`, measuring the column on first use
+        """
+
+        if attr not in self._counts:
+            counts = self._counts[attr] = Counter()
+            for row_id, widths in self._rows.items():
+                widths[attr] = width = self._measure(row_id, attr)
+                counts[width] += 1
+
+            self._max[attr] = max(counts, default=0)
+
+        return self._max[attr]
+
+    def _add(self, row_id: str) -> None:
+        widths = self._rows[row_id] = {}
+        for attr, counts in self._counts.items():
+            widths[attr] = width = self._measure(row_id, attr)
+            counts[width] += 1
+            if width > self._max[attr]:
+                self._max[attr] = width
+
+    def discard(self, row_id: str) -> None:
+        widths = self._rows.pop(row_id, None)
+        if widths is None:
+            return
+
+        for attr, width in widths.items():
+            counts = self._counts[attr]
+            counts[width] -= 1
+            if not counts[width]:
+                del counts[width]
+                if width == self._max[attr]:
+                    self._max[attr] = max(counts, default=0)
+
+    def update(self, row_id: str) -> None:
+        """
+        Measure a displayed row again after its content changed
+        """
+
+        if row_id in self._rows:
+            self.discard(row_id)
+            self._add(row_id)
+
+    def sync(self, row_ids: Iterable[str]) -> bool:
+        """
+        Track exactly `row_ids`, only measuring the rows which are new
+
+        Returns:
+            Whether the width of a column changed
+        """
+
+        widths = dict(self._max)
+        row_ids = list(row_ids)
+        for row_id in self._rows.keys() - set(row_ids):
+            self.discard(row_id)
+
+        for row_id in row_ids:
+            if row_id not in self._rows:
+                self._add(row_id)
+
+        return self._max != widths
+
+    def reset(self) -> None:
+        """
+        Forget all measured widths, e.g. after the formatters changed
+        """
+
+        self._counts.clear()
+        self._max.clear()
+        for widths in self._rows.values():
+            widths.clear()
@@ -0,0 +1,111 @@
+"""
+The parts of Textual's `OptionList` which the trees rely on, but which
+Textual keeps private. They may change with any release, which is why
+Textual is pinned to a minor version, and why nothing else should reach
+into `OptionList` directly.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+from textual import _widget_navigation
+from textual.visual import VisualType
+from textual.widgets import OptionList
+from textual.widgets.option_list import Option
+
+# (option index, line within the option) for every line of the list
+Lines = List[Tuple[int, int]]
+
+
+def find_next_enabled(options: Sequence[Option], anchor: int) -> Optional[int]:
+    return _widget_navigation.find_next_enabled(options, anchor=anchor, direction=1)
+
+
+def prompt_width(option_list: OptionList) -> int:
+    """
+    Width the prompts are rendered at
+    """
+
+    padding = option_list.get_component_styles("option-list--option").padding
+    gutter = option_list._get_left_gutter_width()
+    return option_list.scrollable_content_region.width - gutter - padding.width
+
+
+def option_height(option: Option, prompt_height: int) -> int:
+    # the divider below an option takes a line of its own
+    return prompt_height + option._divider
+
+
+def measure_option(option_list: OptionList, option: Option) -> int:
+    visual = option_list._get_visual(option)
+    height = visual.get_height(option_list.styles, prompt_width(option_list))
+    return option_height(option, height)
+
+
+def lines(option_list: OptionList) -> Lines:
+    return option_list._lines
+
+
+def line_height(option_list: OptionList, index: int) -> Optional[int]:
+    return option_list._line_cache.heights.get(index)
+
+
+def measured_heights(option_list: OptionList) -> Dict[Option, Optional[int]]:
+    """
+    Heights measured so far, by option
+    """
+
+    heights = option_list._line_cache.heights
+    return {
+        option: heights.get(index)
+        for option, index in option_list._option_to_index.items()
+    }
+
+
+def clear_lines(option_list: OptionList) -> None:
+    """
+    Drop the measured heights, for the lines to be measured again on render
+    """
+
+    option_list._line_cache.clear()
+
+
+def clear_caches(option_list: OptionList) -> None:
+    option_list._clear_caches()
+
+
+def set_prompt(option: Option, prompt: VisualType) -> None:
+    option._set_prompt(prompt)
+
+
+def replace_options(
+    option_list: OptionList,
+    options: List[Option],
+    heights: Dict[Option, Optional[int]],
+) -> None:
+    """
+    Replace every option at once, measuring only the options missing
+    from `heights`, instead of clearing the list and adding them back
+    """
+
+    option_list._options[:] = options
+    option_list._id_to_option = {
+        option.id: option for option in options if option.id is not None
+    }
+    option_list._option_to_index = {option: i for i, option in enumerate(options)}
+    option_list._mouse_hovering_over = None
+    option_list._option_render_cache.clear()
+
+    cache = option_list._line_cache
+    cache.clear()
+
+    if option_list.scrollable_content_region:
+        for index, option in enumerate(options):
+            height = heights.get(option)
+            if height is None:
+                height = measure_option(option_list, option)
+
+            cache.index_to_line[index] = len(cache.lines)
+            cache.heights[index] = height
+            cache.lines.extend((index, line) for line in range(height))
+
+    option_list.refresh(layout=option_list.styles.auto_dimensions)
+    option_list._update_lines()
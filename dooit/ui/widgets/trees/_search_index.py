@@ -0,0 +1,52 @@
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+
+class SearchIndex:
+    """
+    Find the ids whose description contains a query, reusing the results of
+    the previous queries while the query is typed out
+    """
+
+    def __init__(self, descriptions: Dict[str, str]) -> None:
+        self.descriptions = descriptions
+        self._results: Dict[str, Set[str]] = {}
+        self._last = ""
+        self._trigrams: Optional[Dict[str, Set[str]]] = None
+
+    @property
+    def trigrams(self) -> Dict[str, Set[str]]:
+        # only needed for queries which don't extend a previous one
+        if self._trigrams is None:
+            trigrams = defaultdict(set)
+            for _id, description in self.descriptions.items():
+                for i in range(len(description) - 2):
+                    trigrams[description[i : i + 3]].add(_id)
+
+            self._trigrams = trigrams
+
+        return self._trigrams
+
+    def _candidates(self, query: str) -> Set[str]:
+        if self._last and self._last in query:
+            return self._results[self._last]
+
+        if len(query) >= 3:
+            sets = [
+                self.trigrams.get(query[i : i + 3], set())
+                for i in range(len(query) - 2)
+            ]
+            return set.intersection(*sorted(sets, key=len))
+
+        return set(self.descriptions)
+
+    def search(self, query: str) -> Set[str]:
+        if query not in self._results:
+            self._results[query] = {
+                _id
+                for _id in self._candidates(query)
+                if query in self.descriptions[_id]
+            }
+
+        self._last = query
+        return self._results[query]
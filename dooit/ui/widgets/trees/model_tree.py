@@ -1,19 +1,33 @@
 from collections import defaultdict
-from functools import cache
-from typing import TYPE_CHECKING, Any, Generic, Optional, TypeVar, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+)
 from textual.app import ComposeResult
+from textual.geometry import Region
+from textual.strip import Strip
 from textual.widgets import Label
 from textual.widgets.option_list import Option
-from dooit.api import Todo, Workspace
+from dooit.api import Todo, Workspace, ChangeSet
 from dooit.ui.api.events import (
     ModeChanged,
     StartSearch,
     StartSort,
     BarNotification,
 )
-from dooit.ui.widgets.renderers import BaseRenderer
+from dooit.ui.widgets.renderers import BaseRenderer, LazyPrompt
 from .base_tree import BaseTree
+from . import _option_list
+from ._column_widths import ColumnWidths
 from ._render_dict import RenderDict
+from ._search_index import SearchIndex
 from ._decorators import (
     fix_highlight,
     refresh_tree,
@@ -43,6 +57,9 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
     }
     """
 
+    # Lines above and below the viewport whose prompts are built ahead of time
+    PROMPT_MARGIN = 20
+
     def __init__(self, model: ModelType, render_dict: RenderDictType) -> None:
         tree = self.__class__.__name__
         super().__init__(id=f"{tree}_{model.uuid}")
@@ -50,10 +67,16 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
         self.expaned = defaultdict(bool)
         self._renderers: RenderDictType = render_dict
         self._filter_refresh = False
+        self._remeasure_pending = False
+        self._search_index: Optional[SearchIndex] = None
+        self._depths: Dict[str, int] = {}
+        self.column_widths = ColumnWidths(self._measure_column)
+
+    def _measure_column(self, _id: str, attr: str) -> int:
+        return self._renderers[_id]._get_attr_width(attr)
 
-    @cache
     def get_column_width(self, attr: str) -> int:
-        return max(i._get_attr_width(attr) for i in self._renderers.values())
+        return self.column_widths.get(attr)
 
     @property
     def formatter(self) -> "ModelFormatterBase":
@@ -93,24 +116,61 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
         self.update_prompt_by_id(option.id)
 
     def update_prompt_by_id(self, _id: str):
-        renderer = self._renderers[_id]
-        self.replace_option_prompt(_id, renderer.prompt)
+        prompt = self._renderers[_id].prompt
+        if self.get_option(_id).prompt is not prompt:
+            self.replace_option_prompt(_id, prompt)
 
     def update_current_prompt(self):
         if self.highlighted is not None:
             self.update_prompt_at_index(self.highlighted)
             self.scroll_to_highlight()
 
+    @property
+    def search_index(self) -> SearchIndex:
+        if self._search_index is None:
+            self._search_index = SearchIndex(
+                {
+                    option.id: self._renderers[option.id].model.description
+                    for option in self.options
+                    if option.id is not None
+                }
+            )
+
+        return self._search_index
+
     def set_filter(self, filter: str) -> None:
         self.filter_refresh = bool(filter)
 
-        for option in self._options:
-            assert option.id
-            matches = self._renderers[option.id].matches_filter(filter)
-            if matches:
-                self.enable_option(option.id)
-            else:
-                self.disable_option(option.id)
+        if filter:
+            matches = self.search_index.search(filter)
+        else:
+            matches = None
+            self._search_index = None
+
+        self._set_disabled(
+            lambda option: matches is not None and option.id not in matches
+        )
+
+    def _set_disabled(self, is_disabled: Callable[[Option], bool]) -> None:
+        """
+        Enable or disable every option at once, with a single refresh
+        """
+
+        changed = False
+        for option in self.options:
+            disabled = is_disabled(option)
+            if option.disabled != disabled:
+                option.disabled = disabled
+                changed = True
+
+        if not changed:
+            return
+
+        highlighted = self.highlighted
+        if highlighted is not None and self.options[highlighted].disabled:
+            self.highlighted = _option_list.find_next_enabled(self.options, highlighted)
+
+        self.refresh()
 
     @property
     def is_editing(self) -> bool:
@@ -127,34 +187,106 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
     @fix_highlight
     def force_refresh(self) -> None:
         self._force_refresh()
-        self.get_column_width.cache_clear()
+
+    def apply_changes(self, changes: ChangeSet) -> None:
+        """
+        Refresh the tree if any of its nodes were changed by another connection
+        """
+
+        displayed = set(self._renderers.keys())
+
+        if changes.full:
+            affected = displayed
+        else:
+            affected = (changes.updated | changes.deleted) & displayed
+            parents = changes.parents & (displayed | {self.model.uuid})
+            if not affected and not parents:
+                return
+
+        if self.is_editing:
+            affected.discard(self.current.id)
+
+        for uuid in affected:
+            self._renderers.pop(uuid)
+            self.column_widths.discard(uuid)
+
+        self._search_index = None
+
+        self.force_refresh()
 
     def is_node_expaned(self, _id: str) -> bool:
         return self.expanded_nodes[_id]
 
-    def _force_refresh(self) -> None:
-        highlighted = self.highlighted
-        self.clear_options()
+    def _shows_children(self, _id: str) -> bool:
+        return self.is_node_expaned(_id) or self.filter_refresh
+
+    def _load_subtree(self) -> None:
+        """
+        Load the displayed models in bulk before walking their relationships
+        """
+
+    def node_depth(self, _id: str) -> int:
+        """
+        How deep a displayed node is nested, 0 for the top level nodes
+        """
 
-        options = []
+        return self._depths.get(_id, 0)
 
-        def add_children_recurse(model: ModelType):
+    def _flatten(self, model: ModelType, depth: int = 0) -> List[str]:
+        """
+        Ids of the displayed descendants of `model`, in display order,
+        recording how deep each of them is on the way
+        """
+
+        ids = []
+        depths = self._depths
+
+        def add_children_recurse(model: ModelType, depth: int):
             for child in getattr(
                 model,
                 self.__class__.__name__.replace("Tree", "").lower(),
             ):
-                render = self._renderers[child.uuid]
-                options.append(Option("", id=render.id))
+                ids.append(child.uuid)
+                depths[child.uuid] = depth
+
+                if self._shows_children(child.uuid):
+                    add_children_recurse(child, depth + 1)
+
+        add_children_recurse(model, depth)
+        return ids
 
-                if self.is_node_expaned(child.uuid) or self.filter_refresh:
-                    add_children_recurse(child)
+    def _reconcile(self, ids: List[str]) -> None:
+        """
+        Update the options to match `ids`, reusing the options which are
+        still displayed and only creating (and rendering) the new ones
+        """
+
+        widths_changed = self.column_widths.sync(ids)
+
+        if [option.id for option in self.options] != ids:
+            existing = {option.id: option for option in self.options}
+            options = [
+                existing.get(_id) or Option(self._renderers[_id].prompt, id=_id)
+                for _id in ids
+            ]
+            _option_list.replace_options(
+                self, options, _option_list.measured_heights(self)
+            )
+
+        # the rows already built are aligned to the previous widths
+        if widths_changed:
+            self.refresh_options()
 
-        add_children_recurse(self.model)
-        self.add_options(options)
+    def _force_refresh(self) -> None:
+        highlighted = self.highlighted
+
+        self._load_subtree()
+        self._depths.clear()
+        ids = self._flatten(self.model)
+        self._reconcile(ids)
         self.highlighted = highlighted
 
-        has_options = bool(options)
-        self.empty_message.display = not has_options
+        self.empty_message.display = not ids
         self.refresh_options()
 
     def on_mount(self):
@@ -186,11 +318,10 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
     def stop_edit(self):
         try:
             self.current.stop_edit()
-        except Exception as e:  # pragma: no cover
+        except Exception as e:
             self.post_message(BarNotification(str(e), "error"))
 
         self.app.post_message(ModeChanged("NORMAL"))
-        self.get_column_width.cache_clear()
         self.update_current_prompt()
 
     def reset_state(self):
@@ -217,11 +348,71 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
 
         return True
 
+    def _build_visible_prompts(self, crop: Region) -> bool:
+        """
+        Build the prompts within the viewport (plus a margin) and return
+        whether any of them turned out taller or shorter than estimated
+        """
+
+        lines = _option_list.lines(self)
+        if not lines:
+            return False
+
+        top = max(self.scroll_offset.y + crop.y - self.PROMPT_MARGIN, 0)
+        bottom = min(
+            self.scroll_offset.y + crop.bottom + self.PROMPT_MARGIN, len(lines) - 1
+        )
+        if top > bottom:
+            return False
+
+        width = _option_list.prompt_width(self)
+
+        resized = False
+        for index in range(lines[top][0], lines[bottom][0] + 1):
+            option = self.options[index]
+            prompt = option.prompt
+            if not isinstance(prompt, LazyPrompt) or prompt.is_built:
+                continue
+
+            height = _option_list.option_height(
+                option, prompt.build(self.styles, width)
+            )
+            resized = resized or height != _option_list.line_height(self, index)
+
+        return resized
+
+    def remeasure_prompts(self) -> None:
+        """
+        Recompute line heights once a prompt's real height is known
+        """
+
+        def remeasure():
+            self._remeasure_pending = False
+            _option_list.clear_lines(self)
+            self.refresh()
+
+        if not self._remeasure_pending:
+            self._remeasure_pending = True
+            self.call_after_refresh(remeasure)
+
+    def render_lines(self, crop: Region) -> List[Strip]:
+        if self._build_visible_prompts(crop):
+            _option_list.clear_lines(self)
+
+        return super().render_lines(crop)
+
     def refresh_options(self) -> None:
-        for i in self._options:
-            assert i.id is not None
-            new_prompt = self._renderers[i.id].prompt
-            self.replace_option_prompt(i.id, new_prompt)
+        changed = False
+
+        for option in self.options:
+            assert option.id is not None
+            prompt = self._renderers[option.id].prompt
+            if option.prompt is not prompt:
+                _option_list.set_prompt(option, prompt)
+                changed = True
+
+        if changed:
+            _option_list.clear_caches(self)
 
     def _get_parent(self, id: str) -> Optional[ModelType]:
         raise NotImplementedError  # pragma: no cover
@@ -230,17 +421,40 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
     def copy_description_to_clipboard(self):
         self.app.copy_to_clipboard(self.current_model.description)
 
-    @refresh_tree
+    @fix_highlight
+    def _set_expanded(self, _id: str, expanded: bool) -> None:
+        """
+        Expand or collapse a node, inserting or removing only its subtree
+        """
+
+        model = self._renderers[_id].model
+        depth = self.node_depth(_id) + 1
+        shown = self._shows_children(_id)
+
+        self.expanded_nodes[_id] = expanded
+        if shown == self._shows_children(_id):
+            return
+
+        ids = [option.id for option in self.options]
+        start = self.get_option_index(_id) + 1
+        subtree = self._flatten(model, depth)
+
+        if expanded:
+            ids[start:start] = subtree
+        else:
+            del ids[start : start + len(subtree)]
+
+        self._reconcile(ids)
+
     def _expand_node(self, _id: str) -> None:
-        self.expanded_nodes[_id] = True
+        self._set_expanded(_id, True)
 
     def expand_node(self) -> None:
         if self.highlighted is not None and self.node.id:
             self._expand_node(self.node.id)
 
-    @refresh_tree
     def _collapse_node(self, _id: str) -> None:
-        self.expanded_nodes[_id] = False
+        self._set_expanded(_id, False)
 
     def _toggle_expand_node(self, _id: str) -> None:
         expanded = self.expanded_nodes[_id]
@@ -275,7 +489,8 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
         node.description = ""
         node.save()
 
-        self.expand_node()
+        self.expanded_nodes[self.current.id] = True
+        self.force_refresh()
         self.highlight_id(node.uuid)
         self.start_edit("description")
 
@@ -1,4 +1,5 @@
 from typing import TYPE_CHECKING, Optional, Union
+from sqlalchemy import inspect
 from textual import on
 from textual.widgets.option_list import Option
 
@@ -26,6 +27,10 @@ class TodosTree(ModelTree[Model, TodoRenderDict]):
     def _get_parent(self, id: str) -> Optional[Todo]:
         return Todo.from_id(id).parent_todo
 
+    def _load_subtree(self) -> None:
+        if "todos" in inspect(self.model).unloaded:
+            Todo.load_subtree(self.model)
+
     def is_node_expaned(self, _id: str) -> bool:
         return super().is_node_expaned(_id) or self.api.vars.always_expand_todos
 
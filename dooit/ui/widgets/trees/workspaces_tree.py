@@ -1,4 +1,5 @@
 from typing import TYPE_CHECKING, Optional
+from sqlalchemy import inspect
 from textual import on
 from textual.widgets.option_list import Option
 
@@ -27,6 +28,10 @@ class WorkspacesTree(ModelTree[Workspace, WorkspaceRenderDict]):
     def _get_parent(self, id: str) -> Optional[Workspace]:
         return Workspace.from_id(id).parent_workspace
 
+    def _load_subtree(self) -> None:
+        if "workspaces" in inspect(self.model).unloaded:
+            Workspace.load_subtree(self.model)
+
     def is_node_expaned(self, _id: str) -> bool:
         return super().is_node_expaned(_id) or self.api.vars.always_expand_workspaces
 
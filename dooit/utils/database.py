@@ -1,10 +1,15 @@
 from sqlalchemy import MetaData
 from sqlalchemy.orm import Session
+from dooit.api.fts import FTS_TABLES
 
 
 def delete_all_data(session: Session):
     meta = MetaData()
     meta.reflect(bind=session.get_bind())
     for table in reversed(meta.sorted_tables):
+        # full text indexes are emptied by the triggers of their tables
+        if table.name.startswith(tuple(FTS_TABLES.values())):
+            continue
+
         session.execute(table.delete())
     session.commit()
@@ -3,7 +3,7 @@ import os
 from typing import Optional
 from rich.style import Style
 from dooit.api import Todo
-from dooit.ui.api import DooitAPI, subscribe, timer
+from dooit.ui.api import DooitAPI, pure_formatter, subscribe, timer
 from dooit.ui.api.widgets import TodoWidget, WorkspaceWidget
 from dooit.ui.api.events import ModeChanged, Startup
 from dooit.ui.widgets.bars import StatusBarWidget
@@ -65,6 +65,7 @@ def get_user(api: DooitAPI, _: Startup):
 # Todo formatters
 
 
+@pure_formatter
 def todo_status_formatter(status: str, _: Todo, api: DooitAPI):
     text = "o"
     theme = api.vars.theme
@@ -82,6 +83,7 @@ def todo_status_formatter(status: str, _: Todo, api: DooitAPI):
     return Text(text, style=Style(color=color, bold=True))
 
 
+@pure_formatter
 def todo_due_formatter(due, _):
     if due is None:
         return ""
@@ -94,6 +96,7 @@ def todo_due_formatter(due, _):
     return text
 
 
+@pure_formatter
 def todo_urgency_formatter(urgency, _, api: DooitAPI):
     if urgency == 0:
         return ""
@@ -112,6 +115,7 @@ def todo_urgency_formatter(urgency, _, api: DooitAPI):
     )
 
 
+@pure_formatter
 def todo_recurrence_formatter(recurrence: Optional[timedelta], _):
     if recurrence is None:
         return ""
@@ -145,6 +149,7 @@ def key_setup(api: DooitAPI, _):
     api.keys.set(["=", "+"], api.increase_urgency)
     api.keys.set(["-", "_"], api.decrease_urgency)
     api.keys.set("/", api.start_search)
+    api.keys.set("<ctrl+f>", api.start_global_search)
     api.keys.set("<ctrl+s>", api.start_sort)
     api.keys.set("<ctrl+q>", api.quit)
     api.keys.set("?", api.show_help)
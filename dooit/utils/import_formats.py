@@ -0,0 +1,80 @@
+import csv
+import json
+import re
+from typing import Any, Callable, Dict, Iterator, TextIO
+
+# records from text formats have the `line` they were read from
+Record = Dict[str, Any]
+
+TODOTXT_DATE = r"\d{4}-\d{2}-\d{2}"
+
+
+def read_json(file: TextIO) -> Iterator[Record]:
+    data = json.load(file)
+    yield from [data] if isinstance(data, dict) else data
+
+
+def read_ndjson(file: TextIO) -> Iterator[Record]:
+    for number, line in enumerate(file, 1):
+        if line.strip():
+            yield {**json.loads(line), "line": number}
+
+
+def read_csv(file: TextIO) -> Iterator[Record]:
+    reader = csv.DictReader(file)
+    for row in reader:
+        record = {key: value for key, value in row.items() if value not in ("", None)}
+        yield {**record, "line": reader.line_num}
+
+
+def parse_todotxt(line: str) -> Record:
+    """
+    Convert a todo.txt line, using priorities A to D as urgencies 4 to 1 and
+    the first +project as the workspace
+    """
+
+    record: Record = {}
+
+    if line.startswith("x "):
+        record["status"] = "completed"
+        line = re.sub(rf"^x ({TODOTXT_DATE} )?", "", line)
+
+    if match := re.match(r"^\(([A-Z])\) ", line):
+        record["urgency"] = max(1, 4 - (ord(match.group(1)) - ord("A")))
+        line = line[match.end() :]
+
+    line = re.sub(rf"^{TODOTXT_DATE} ", "", line)
+
+    words = []
+    for word in line.split():
+        if word.startswith("due:"):
+            record["due"] = word[4:]
+        elif word.startswith("+") and len(word) > 1 and "workspace" not in record:
+            record["workspace"] = word[1:]
+        else:
+            words.append(word)
+
+    record["description"] = " ".join(words)
+    return record
+
+
+def read_todotxt(file: TextIO) -> Iterator[Record]:
+    for number, line in enumerate(file, 1):
+        if line.strip():
+            yield {**parse_todotxt(line.strip()), "line": number}
+
+
+READERS: Dict[str, Callable[[TextIO], Iterator[Record]]] = {
+    "json": read_json,
+    "ndjson": read_ndjson,
+    "csv": read_csv,
+    "todotxt": read_todotxt,
+}
+
+EXTENSIONS = {
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".csv": "csv",
+    ".txt": "todotxt",
+}
@@ -0,0 +1,50 @@
+import asyncio
+from time import monotonic
+from typing import Callable, List, Optional
+
+
+class LoopMonitor:
+    """
+    Measure how late the event loop wakes up a sleeping task, to report
+    handlers which block it (e.g. with disk I/O)
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold: float = 0.05,
+        on_stall: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.on_stall = on_stall
+        self.stalls: List[float] = []
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _watch(self) -> None:
+        while True:
+            start = monotonic()
+            await asyncio.sleep(self.interval)
+            lag = monotonic() - start - self.interval
+
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                self.stalls.append(lag)
+                if self.on_stall:
+                    self.on_stall(lag)
+
+    def report(self) -> str:
+        return (
+            f"{len(self.stalls)} event loop stalls over "
+            f"{self.threshold * 1000:.0f}ms, longest {self.max_lag * 1000:.0f}ms"
+        )
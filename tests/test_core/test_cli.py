@@ -0,0 +1,359 @@
+import csv
+import io
+import json
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from click.testing import CliRunner
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import OperationalError
+import pytest
+from dooit.__main__ import main
+from dooit.api import Todo, Workspace, manager
+from dooit.api.change_log import ChangeLog
+from dooit.api.export import write_json, write_ndjson
+from dooit.api.manager import Manager
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "dooit.db")
+    manager.connect(path)
+
+    work = Workspace(description="work")
+    home = Workspace(description="home")
+    work.save()
+    home.save()
+
+    report = Todo(description="write report @work", parent_workspace=work, urgency=3)
+    report.save()
+    Todo(description="charts @work @later", parent_todo=report).save()
+    Todo(
+        description="late @work",
+        parent_workspace=work,
+        due=datetime.now() - timedelta(days=1),
+    ).save()
+    Todo(description="dishes", parent_workspace=home, pending=False).save()
+
+    yield path
+    manager.session.close()
+
+
+def query(db, *args):
+    result = CliRunner().invoke(main, ["--db", db, "query", *args])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def test_query_ndjson(db):
+    todos = [json.loads(line) for line in query(db).splitlines()]
+    assert [t["description"] for t in todos] == [
+        "write report @work",
+        "charts @work @later",
+        "late @work",
+        "dishes",
+    ]
+    assert todos[1]["workspace"] == "work"
+    assert todos[1]["tags"] == ["@work", "@later"]
+
+
+def test_query_filters(db):
+    def descriptions(*args):
+        return [t["description"] for t in json.loads(query(db, "-f", "json", *args))]
+
+    assert descriptions("-w", "home") == ["dishes"]
+    assert descriptions("-s", "overdue") == ["late @work"]
+    assert descriptions("-s", "completed") == ["dishes"]
+    assert descriptions("-s", "pending", "-t", "@work") == [
+        "write report @work",
+        "charts @work @later",
+    ]
+    assert descriptions("-t", "later", "-t", "work") == ["charts @work @later"]
+    assert descriptions("-t", "wor") == []
+    assert descriptions("-u", "3") == ["write report @work"]
+    assert descriptions("--due-before", datetime.now().strftime("%Y-%m-%d")) == [
+        "late @work"
+    ]
+
+    result = CliRunner().invoke(main, ["--db", db, "query", "-w", "nothing"])
+    assert result.exit_code != 0
+
+
+def test_query_without_textual(db):
+    code = (
+        "import sys\n"
+        "from dooit.__main__ import main\n"
+        f"main(['--db', {db!r}, 'query'], standalone_mode=False)\n"
+        "assert 'textual' not in sys.modules\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True)
+    assert result.returncode == 0, result.stderr.decode()
+    assert len(result.stdout.splitlines()) == 4
+
+
+@pytest.mark.parametrize("write", [write_ndjson, write_json])
+def test_export_snapshot(db, write):
+    other = Manager()
+    other.connect(db)
+
+    class File(io.StringIO):
+        def write(self, s: str) -> int:
+            # another instance saves a todo while the export is running
+            if not self.tell():
+                work = other.session.scalars(
+                    select(Workspace).filter_by(description="work")
+                ).one()
+                other.save(Todo(description="new", parent_workspace=work))
+
+            return super().write(s)
+
+    file = File()
+    header = write(file)
+
+    assert "new" not in file.getvalue()
+    assert header["seq"] < other.session.scalar(select(func.max(ChangeLog.seq)))
+    other.session.close()
+
+
+def test_query_read_only(db, tmp_path):
+    # checkpoints the write-ahead log into the file
+    manager.engine.dispose()
+    before = Path(db).read_bytes()
+
+    query(db)
+    export(db)
+    manager.engine.dispose()
+    assert Path(db).read_bytes() == before
+    assert manager.read_only and manager.has_fts
+
+    with pytest.raises(OperationalError, match="readonly"):
+        manager.session.execute(text("DELETE FROM change_log"))
+
+
+def test_query_missing_database(tmp_path):
+    for command in ("query", "export"):
+        path = tmp_path / "missing.db"
+        result = CliRunner().invoke(main, ["--db", str(path), command])
+        assert result.exit_code == 1
+        assert "start dooit once to create it" in " ".join(result.output.split())
+        assert not path.exists()
+
+
+def test_query_outdated_database(tmp_path):
+    path = tmp_path / "old.db"
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE workspace (id INTEGER PRIMARY KEY)")
+
+    result = CliRunner().invoke(main, ["--db", str(path), "query"])
+    assert result.exit_code == 1
+    assert "older version of dooit" in " ".join(result.output.split())
+
+
+def import_file(db, path, *args):
+    result = CliRunner().invoke(main, ["--db", db, "import", str(path), *args])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def get_workspace(name):
+    query = select(Workspace).where(Workspace.description == name)
+    return manager.session.scalars(query).first()
+
+
+def workspace_todos(name):
+    workspace = get_workspace(name)
+    assert workspace is not None
+    return [(t.description, [c.description for c in t.todos]) for t in workspace.todos]
+
+
+def test_import_todotxt(db, tmp_path):
+    path = tmp_path / "todo.txt"
+    path.write_text(
+        "(A) 2024-01-01 call mom +home @phone due:2030-05-01\n"
+        "x 2024-01-02 2024-01-01 pay rent +home\n"
+        "(F) stretch\n"
+    )
+    assert "Imported 3 todos" in import_file(db, path, "-w", "misc")
+
+    manager.session.expire_all()
+    assert workspace_todos("home") == [
+        ("dishes", []),
+        ("call mom @phone", []),
+        ("pay rent", []),
+    ]
+    call, rent = get_workspace("home").todos[1:]
+    assert call.urgency == 4 and call.due == datetime(2030, 5, 1)
+    assert call.order_index == 1 and rent.order_index == 2
+    assert rent.status == "completed"
+    assert get_workspace("misc").todos[0].urgency == 1
+
+
+def test_import_json_nested(db, tmp_path):
+    path = tmp_path / "todos.json"
+    path.write_text(
+        json.dumps(
+            [
+                {
+                    "description": "trip",
+                    "urgency": 9,
+                    "recurrence": "2w",
+                    "todos": [
+                        {"description": "tickets", "todos": [{"description": "seat"}]}
+                    ],
+                },
+                {"id": 7, "description": "garden"},
+                {"description": "weeds", "parent_todo_id": 7},
+            ]
+        )
+    )
+    import_file(db, path, "-w", "plans")
+
+    manager.session.expire_all()
+    assert workspace_todos("plans") == [("trip", ["tickets"]), ("garden", ["weeds"])]
+    trip = get_workspace("plans").todos[0]
+    assert trip.urgency == 4 and trip.recurrence == timedelta(weeks=2)
+    assert trip.todos[0].todos[0].description == "seat"
+
+
+def test_import_csv(db, tmp_path):
+    path = tmp_path / "todos.csv"
+    path.write_text(
+        "id,description,workspace,parent_todo_id,urgency,due\n"
+        "1,paint,home,,2,2030-01-01\n"
+        "2,buy brushes,,1,,\n"
+    )
+    import_file(db, path)
+
+    manager.session.expire_all()
+    assert workspace_todos("home") == [("dishes", []), ("paint", ["buy brushes"])]
+
+
+def test_import_csv_round_trip(db, tmp_path):
+    # booleans and numbers only come back as strings from a CSV file
+    rows = [json.loads(line) for line in export(db).splitlines()[1:]]
+    todos = [row for row in rows if row.get("description") == "dishes"]
+    todos[0].update(effort=3, description="dishes again")
+    path = tmp_path / "todos.csv"
+    with path.open("w", newline="") as file:
+        writer = csv.DictWriter(file, ["description", "pending", "effort"])
+        writer.writeheader()
+        writer.writerows(
+            {key: todo[key] for key in writer.fieldnames} for todo in todos
+        )
+        writer.writerow({"description": "mop", "pending": "no", "effort": "0"})
+        writer.writerow({"description": "sweep", "pending": "YES", "effort": ""})
+
+    import_file(db, path, "-w", "chores")
+
+    manager.session.expire_all()
+    dishes, mop, sweep = get_workspace("chores").todos
+    assert (dishes.description, dishes.pending, dishes.effort) == (
+        "dishes again",
+        False,
+        3,
+    )
+    assert not mop.pending and mop.effort == 0
+    assert sweep.pending and sweep.effort == 0
+
+
+def test_import_csv_invalid_values(db, tmp_path):
+    path = tmp_path / "todos.csv"
+    path.write_text("description,effort\nfine,2\nhalf,1.5\n")
+    result = CliRunner().invoke(main, ["--db", db, "import", str(path), "-w", "x"])
+    assert result.exit_code == 1
+    assert "line 3" in result.output and "1.5" in result.output
+
+    path.write_text("description,pending\nsoon,maybe\n")
+    result = CliRunner().invoke(main, ["--db", db, "import", str(path), "-w", "x"])
+    assert result.exit_code == 1
+    assert "line 2" in result.output
+
+    manager.session.expire_all()
+    assert get_workspace("x") is None
+
+
+def test_import_query_round_trip(db, tmp_path):
+    path = tmp_path / "todos.ndjson"
+    path.write_text(query(db))
+    import_file(db, path)
+
+    manager.session.expire_all()
+    assert (
+        workspace_todos("work")
+        == [
+            ("write report @work", ["charts @work @later"]),
+            ("late @work", []),
+        ]
+        * 2
+    )
+
+
+def test_import_errors(db, tmp_path):
+    missing_parent = tmp_path / "todos.ndjson"
+    missing_parent.write_text('{"description": "orphan", "parent_todo_id": 5}\n')
+    no_workspace = tmp_path / "todo.txt"
+    no_workspace.write_text("nowhere\n")
+
+    for path in (missing_parent, no_workspace):
+        result = CliRunner().invoke(main, ["--db", db, "import", str(path)])
+        assert result.exit_code == 1
+
+    manager.session.expire_all()
+    assert get_workspace("nowhere") is None
+    assert len(manager.session.scalars(select(Todo)).all()) == 4
+
+
+def export(db, *args):
+    result = CliRunner().invoke(main, ["--db", db, "export", *args])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def test_export_nested_json(db):
+    data = json.loads(export(db, "-f", "json"))
+    assert data["since"] is None
+
+    work, home = data["workspaces"]
+    assert work["description"] == "work"
+    assert [t["description"] for t in work["todos"]] == [
+        "write report @work",
+        "late @work",
+    ]
+    assert work["todos"][0]["todos"][0]["description"] == "charts @work @later"
+    assert home["todos"][0]["pending"] is False
+
+
+def test_export_incremental(db):
+    header, *rows = map(json.loads, export(db).splitlines())
+    assert [row["type"] for row in rows] == ["workspace"] + ["todo"] * 3 + [
+        "workspace",
+        "todo",
+    ]
+    assert rows[2]["parent_todo_id"] == rows[1]["id"]
+
+    dishes, late = rows[-1]["id"], rows[3]["id"]
+    # the export left the manager connected read-only
+    manager.connect(db)
+    todo = manager.session.get(Todo, dishes)
+    todo.description = "laundry"
+    todo.save()
+    manager.session.get(Todo, late).drop()
+
+    header2, *changes = map(
+        json.loads, export(db, "--since", header["seq"]).splitlines()
+    )
+    assert header2["since"] == header["seq"] and header2["seq"] > header["seq"]
+    assert [(c["type"], c["id"], c.get("description")) for c in changes] == [
+        ("todo", dishes, "laundry"),
+        ("todo", late, None),
+    ]
+    assert changes[1]["deleted"]
+
+    assert export(db, "--since", header2["seq"]).splitlines()[1:] == []
+
+    # older than what the change log keeps
+    result = CliRunner().invoke(main, ["--db", db, "export", "--since", "0"])
+    assert "exporting everything" in result.stderr
+    assert len(result.stdout.splitlines()) == 1 + 5
@@ -0,0 +1,103 @@
+from sqlalchemy import text
+import pytest
+from dooit.api import Todo, Workspace, manager
+from dooit.api.fts import fts_query, search
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "dooit.db")
+    manager.connect(path)
+
+    work = Workspace(description="work")
+    work.save()
+    home = Workspace(description="home")
+    home.save()
+
+    report = Todo(description="write the report @work", parent_workspace=work)
+    report.save()
+    Todo(description="reply to reports @later", parent_todo=report).save()
+    Todo(description="repaint the fence", parent_workspace=home).save()
+    Todo(description="work on the garden", parent_workspace=home).save()
+
+    yield path
+    manager.session.close()
+
+
+def descriptions(query):
+    return [result.description for result in search(query)]
+
+
+def test_fts_query():
+    assert fts_query("rep  @work") == '"rep"* "@work"*'
+    assert fts_query('say "hi"') == '"say"* """hi"""*'
+
+
+def test_search_words(db):
+    assert manager.has_fts
+    assert descriptions("garden") == ["work on the garden"]
+    assert set(descriptions("rep")) == {
+        "write the report @work",
+        "reply to reports @later",
+        "repaint the fence",
+    }
+    assert descriptions("the rep fence") == ["repaint the fence"]
+    assert descriptions("") == []
+
+
+def test_search_tags(db):
+    # `@work` is a tag, while `work` is a word of its own
+    assert descriptions("@work") == ["write the report @work"]
+    assert set(descriptions("work")) == {"work", "work on the garden"}
+    assert descriptions("@lat") == ["reply to reports @later"]
+
+
+def test_search_ranking(db):
+    # results are best first, whichever table they are from
+    Todo(
+        description="work work work",
+        parent_workspace=Workspace._get_or_create_root().workspaces[0],
+    ).save()
+    results = descriptions("work")
+
+    assert results[0] == "work work work"
+    assert isinstance(search("work", limit=1)[0], Todo)
+    assert len(search("work", limit=2)) == 2
+
+
+def test_search_follows_changes(db):
+    todo = search("fence")[0]
+    assert isinstance(todo, Todo)
+
+    todo.description = "paint the gate"
+    todo.save()
+    assert descriptions("fence") == []
+    assert descriptions("gate") == ["paint the gate"]
+
+    todo.drop()
+    assert descriptions("gate") == []
+
+
+def test_existing_database(db):
+    # a database from before the index existed is indexed on startup
+    with manager.engine.begin() as connection:
+        connection.execute(text("DROP TABLE todo_fts"))
+        for trigger in ("insert", "update", "delete"):
+            connection.execute(text(f"DROP TRIGGER todo_fts_{trigger}"))
+
+    Workspace._get_or_create_root().workspaces[0].add_todo().save()
+    manager.session.close()
+    manager.connect(db)
+
+    assert descriptions("fence") == ["repaint the fence"]
+
+
+def test_search_without_fts(db, monkeypatch):
+    monkeypatch.setattr(manager, "has_fts", False)
+
+    assert set(descriptions("rep")) == {
+        "write the report @work",
+        "reply to reports @later",
+        "repaint the fence",
+    }
+    assert descriptions("garden work") == ["work on the garden"]
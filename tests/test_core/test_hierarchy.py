@@ -0,0 +1,152 @@
+from sqlalchemy import select, text
+import pytest
+from dooit.api import Todo, Workspace, manager
+from dooit.api.bulk import import_todos
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "dooit.db")
+    manager.connect(path)
+    yield path
+    manager.session.close()
+
+
+@pytest.fixture
+def tree(db):
+    work = Workspace(description="work")
+    work.save()
+    project = work.add_workspace()
+
+    a = project.add_todo()
+    b = a.add_todo()
+    c = b.add_todo()
+    d = a.add_todo()
+
+    return work, project, a, b, c, d
+
+
+def test_paths(tree):
+    work, project, a, b, c, d = tree
+    root = work.parent_workspace
+    assert root is not None
+
+    assert root.path == f"{root.id}/"
+    assert project.path == f"{root.id}/{work.id}/{project.id}/"
+    assert a.path == f"{project.id}/{a.id}/"
+    assert c.path == f"{project.id}/{a.id}/{b.id}/{c.id}/"
+
+    assert [root.nest_level, work.nest_level, project.nest_level] == [0, 0, 1]
+    assert [a.nest_level, b.nest_level, c.nest_level, d.nest_level] == [0, 1, 2, 1]
+
+
+def test_nest_level_before_saving(tree):
+    work, project, a, b, c, d = tree
+
+    # worked out from the parents, without writing anything
+    new = Todo(parent_todo=c)
+    assert new.nest_level == 3
+    assert Workspace(parent_workspace=project).nest_level == 2
+    assert new.path is None
+    assert new.id is None
+
+
+def test_ancestors_and_descendants(tree):
+    work, project, a, b, c, d = tree
+
+    assert c.ancestors() == [a, b]
+    assert a.ancestors() == []
+    assert project.ancestors() == [work]
+
+    assert a.descendants() == [b, c, d]
+    assert b.descendants() == [c]
+    assert a.descendant_count() == 3
+    assert work.descendants() == [project]
+
+    # `b` is completed along with its only child
+    c.toggle_complete()
+    assert project.todo_count() == 4
+    assert project.todo_count(pending=False) == 2
+    assert work.todo_count() == 0
+
+
+def test_move_subtree(tree):
+    work, project, a, b, c, d = tree
+    versions = b.version, c.version
+
+    b.parent_todo = d
+    b.save()
+    assert b.path == f"{project.id}/{a.id}/{d.id}/{b.id}/"
+    assert c.path == f"{project.id}/{a.id}/{d.id}/{b.id}/{c.id}/"
+    # the subtree moved along, and stale copies of it can't be saved
+    assert (b.version, c.version) == (versions[0] + 1, versions[1] + 1)
+
+    a.parent_workspace = work
+    a.save()
+    assert c.path == f"{work.id}/{a.id}/{d.id}/{b.id}/{c.id}/"
+    assert work.todo_count() == 4
+    assert project.todo_count() == 0
+
+
+def test_outdated_move_trigger(db, tree):
+    # as created before the trigger bumped the versions
+    with manager.engine.begin() as connection:
+        connection.execute(text("DROP TRIGGER todo_path_move"))
+        connection.execute(
+            text("""
+            CREATE TRIGGER todo_path_move AFTER UPDATE OF parent_todo_id ON todo
+            BEGIN SELECT 1; END
+            """)
+        )
+
+    manager.session.close()
+    manager.connect(db)
+
+    with manager.engine.connect() as connection:
+        sql = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE name = 'todo_path_move'")
+        ).scalar_one()
+    assert "version" in sql
+
+
+def test_drop_subtree(tree):
+    work, project, a, b, c, d = tree
+    ids = [b.id, c.id]
+
+    b.drop()
+    assert project.todo_count() == 2
+    assert a.todos == [d]
+    assert manager.session.scalars(select(Todo).where(Todo.id.in_(ids))).all() == []
+
+
+def test_bulk_insert_paths(db):
+    import_todos(
+        [{"description": "a", "todos": [{"description": "b"}]}],
+        workspace="imported",
+    )
+
+    b = manager.session.scalars(select(Todo).where(Todo.description == "b")).one()
+    assert b.ancestors()[0].description == "a"
+    assert b.parent_workspace is None
+    assert b.nest_level == 1
+
+
+def test_existing_database(db, tree):
+    work, project, a, b, c, d = tree
+    paths = [model.path for model in (project, a, b, c)]
+
+    # a database from before the paths existed
+    with manager.engine.begin() as connection:
+        for table in ("todo", "workspace"):
+            connection.execute(text(f"DROP INDEX ix_{table}_path"))
+            connection.execute(text(f"DROP TRIGGER {table}_path_insert"))
+            connection.execute(text(f"DROP TRIGGER {table}_path_move"))
+            connection.execute(text(f"ALTER TABLE {table} DROP COLUMN path"))
+
+    manager.session.close()
+    manager.connect(db)
+
+    loaded = [
+        manager.session.get(type(model), model.id) for model in (project, a, b, c)
+    ]
+    assert [model.path for model in loaded] == paths
@@ -1,3 +1,5 @@
+from sqlalchemy import event
+from dooit.api import manager
 from tests.test_core.core_base import *  # noqa
 
 
@@ -8,3 +10,76 @@ def test_todo_status_update_children(todo1):
         child_todo.toggle_complete()
 
     assert not todo1.is_pending
+
+
+def test_sibling_insert_only_shifts_siblings(create_workspace, create_todo):
+    w1 = create_workspace()
+    w2 = create_workspace()
+
+    first = [create_todo(parent_workspace=w1) for _ in range(3)]
+    other = [create_todo(parent_workspace=w2) for _ in range(3)]
+    child = create_todo(parent_todo=other[0])
+
+    new = first[0].add_sibling()
+
+    assert [t.order_index for t in first] == [0, 2, 3]
+    assert new.order_index == 1
+    assert [t.order_index for t in other] == [0, 1, 2]
+    assert child.order_index == 0
+
+
+def test_status_propagates_through_subtree(create_todo):
+    top = create_todo("top")
+    middle = create_todo("middle", parent_todo=top)
+    leaves = [create_todo(f"leaf {i}", parent_todo=middle) for i in range(2)]
+    other = create_todo("other", parent_todo=top)
+
+    def statuses():
+        manager.session.expire_all()
+        return [t.pending for t in (top, middle, *leaves, other)]
+
+    top.toggle_complete()
+    assert statuses() == [False] * 5
+
+    top.toggle_complete()
+    assert statuses() == [True] * 5
+
+    # parents are completed once all of their children are
+    leaves[0].toggle_complete()
+    leaves[1].toggle_complete()
+    assert statuses() == [True, False, False, False, True]
+
+    other.toggle_complete()
+    assert statuses() == [False] * 5
+
+    leaves[0].toggle_complete()
+    assert statuses() == [True, True, True, False, False]
+
+
+def test_status_statements_for_large_subtree(create_todo):
+    def statements(size):
+        top = create_todo("top")
+        todos = [top]
+        for i in range(size):
+            todos.append(create_todo(str(i), parent_todo=todos[i // 3]))
+
+        executed = []
+
+        def count(*_):
+            executed.append(None)
+
+        event.listen(manager.engine, "before_cursor_execute", count)
+        try:
+            top.toggle_complete()
+            completed = len(executed)
+            top.toggle_complete()
+            reopened = len(executed) - completed
+        finally:
+            event.remove(manager.engine, "before_cursor_execute", count)
+
+        manager.session.expire_all()
+        assert all(todo.pending for todo in todos)
+        return completed, reopened
+
+    # as many statements whatever the size of the subtree
+    assert statements(3) == statements(300)
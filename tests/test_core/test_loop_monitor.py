@@ -0,0 +1,20 @@
+import asyncio
+import time
+from dooit.utils.loop_monitor import LoopMonitor
+
+
+async def test_loop_monitor():
+    stalls = []
+    monitor = LoopMonitor(interval=0.01, threshold=0.08, on_stall=stalls.append)
+    monitor.start()
+
+    await asyncio.sleep(0.05)
+    assert not stalls
+
+    time.sleep(0.15)
+    await asyncio.sleep(0.05)
+    monitor.stop()
+
+    assert len(stalls) == 1
+    assert stalls[0] >= 0.08
+    assert monitor.report().startswith("1 event loop stalls")
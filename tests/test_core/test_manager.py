@@ -0,0 +1,118 @@
+import asyncio
+from pytest import raises
+from sqlalchemy import event, text
+from dooit.__main__ import main
+from dooit.api.exceptions import DatabaseProfileError
+from dooit.api.manager import DB_PROFILES, Manager
+
+
+def pragma(manager: Manager, name: str):
+    return manager.session.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_profiles(tmp_path):
+    manager = Manager()
+    manager.connect(str(tmp_path / "dooit.db"))
+
+    assert manager.profile == "wal"
+    assert pragma(manager, "journal_mode") == "wal"
+    assert pragma(manager, "synchronous") == 1
+    assert pragma(manager, "busy_timeout") == 5000
+
+    manager.set_profile("safe")
+    assert pragma(manager, "journal_mode") == "delete"
+    assert pragma(manager, "synchronous") == 2
+
+    with raises(DatabaseProfileError):
+        manager.set_profile("fastest")
+
+    assert manager.profile == "safe"
+    manager.session.close()
+
+
+def test_unknown_profile(tmp_path):
+    with raises(DatabaseProfileError):
+        Manager().connect(str(tmp_path / "dooit.db"), "fastest")
+
+
+def test_cli_profiles():
+    option = next(param for param in main.params if param.name == "db_profile")
+    assert list(option.type.choices) == list(DB_PROFILES)
+
+
+async def test_delayed_commit(tmp_path):
+    from dooit.api import Workspace, manager
+
+    path = str(tmp_path / "dooit.db")
+    manager.connect(path)
+    other = Manager()
+    other.connect(path)
+
+    commits = []
+    event.listen(manager.session, "after_commit", lambda _: commits.append(1))
+
+    manager.commit_delay = 0.05
+    for description in "abc":
+        Workspace(description=description).save()
+
+    assert not commits
+    assert not other.has_changed()
+
+    await asyncio.sleep(0.1)
+    assert len(commits) == 1
+    assert other.has_changed()
+
+    Workspace(description="d").save()
+    manager.flush_pending()
+    assert len(commits) == 2
+
+    manager.commit_delay = None
+    manager.session.close()
+    other.session.close()
+
+
+async def test_delayed_commit_reloads_hook_updates(tmp_path):
+    from dooit.api import Todo, Workspace, manager
+
+    manager.connect(str(tmp_path / "dooit.db"))
+    manager.commit_delay = 0.05
+
+    parent = Todo(parent_workspace=Workspace(description="w"))
+    parent.save()
+    child = parent.add_todo()
+    assert child.pending
+
+    # the child is completed by the hooks, without going through the session
+    parent.toggle_complete()
+    assert not child.pending
+
+    await asyncio.sleep(0.1)
+    assert not child.pending
+
+    manager.commit_delay = None
+    manager.session.close()
+
+
+async def test_delayed_commit_error(tmp_path):
+    from dooit.api import Todo, Workspace, manager
+
+    manager.connect(str(tmp_path / "dooit.db"))
+    errors = []
+    manager.on_commit_error = errors.append
+    manager.commit_delay = 0.05
+
+    todo = Todo(description="todo", parent_workspace=Workspace(description="w"))
+    todo.save()
+    manager.flush_pending()
+
+    # only written by the delayed commit, with nobody to raise it to
+    Workspace(description="other").save()
+    todo.description = None  # type: ignore
+    await asyncio.sleep(0.1)
+
+    assert len(errors) == 1
+    assert todo.description == "todo"
+
+    manager.commit_delay = None
+    manager.on_commit_error = None
+    manager.session.close()
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+import yaml
+from sqlalchemy import select
+from dooit.api import Todo, Workspace
+from dooit.backport.migrate_from_v2 import Migrator2to3
+from tests.test_core.core_base import *  # noqa
+
+OLD_DATA = [
+    {
+        "description": "work",
+        "workspaces": [
+            {"description": "meetings", "todos": [[{"description": "standup"}]]}
+        ],
+        "todos": [
+            [
+                {
+                    "description": "report",
+                    "urgency": 7,
+                    "due": "1700000000.0",
+                    "recurrence": "2d",
+                    "effort": "3",
+                },
+                [
+                    [{"description": "charts", "status": "COMPLETED"}],
+                    [{"description": "tables", "due": "none"}],
+                ],
+            ],
+            [{"description": "email", "effort": ""}],
+        ],
+    },
+    {"description": "home"},
+]
+
+
+def test_migrate(session, tmp_path, monkeypatch):
+    old_location = tmp_path / "todo.yaml"
+    old_location.write_text(yaml.safe_dump(OLD_DATA))
+    monkeypatch.setattr(Migrator2to3, "old_location", old_location)
+
+    Migrator2to3().migrate()
+    session.expire_all()
+
+    assert not old_location.exists()
+    assert old_location.with_suffix(".bak").exists()
+
+    work, home = Workspace._get_or_create_root().workspaces
+    assert [w.order_index for w in (work, home)] == [0, 1]
+    assert home.description == "home"
+    assert work.workspaces[0].todos[0].description == "standup"
+
+    report, email = work.todos
+    assert [report.order_index, email.order_index] == [0, 1]
+    assert report.urgency == 4 and report.effort == 3
+    assert report.due == datetime.fromtimestamp(1700000000)
+    assert report.recurrence == timedelta(days=2)
+    assert email.effort == 0
+
+    charts, tables = report.todos
+    assert not charts.pending and tables.pending
+    assert tables.due is None and tables.order_index == 1
+
+    # the next todos get ids after the migrated ones
+    todo = Todo(parent_workspace=home)
+    todo.save()
+    assert todo.id > max(session.scalars(select(Todo.id).where(Todo.id != todo.id)))
@@ -1,31 +1,347 @@
-# FIXME: This works but not in github workflows?
-#
-# from time import sleep
-# from pathlib import Path
-# from dooit.api.manager import Manager
-# from dooit.api.workspace import Workspace
-# from tests.test_core.core_base import CoreTestBase
-# import tempfile
-#
-#
-# class TestSync(CoreTestBase):
-#     def test_sync(self):
-#         # create a temporary folder
-#         temp_folder = tempfile.TemporaryDirectory()
-#         temp_db = Path(temp_folder.name) / "dooit1.db"
-#         TEMP_CONN = f"sqlite:////{temp_db}"
-#
-#         manager1 = Manager()
-#         manager2 = Manager()
-#
-#         manager1.connect(TEMP_CONN)
-#         manager2.connect(TEMP_CONN)
-#
-#         w = Workspace(description="test")
-#         manager1.save(w)
-#
-#         self.assertFalse(manager1.has_changed())
-#         sleep(1)  # ensuring the times dont match
-#
-#         self.assertTrue(manager2.has_changed())
-#         temp_folder.cleanup()
+from datetime import datetime
+from sqlalchemy import event, select, text
+from dooit.api.exceptions import ConcurrentEditError
+from dooit.api.manager import ChangeSet, Manager, manager
+from dooit.api.todo import Todo
+from dooit.api.workspace import Workspace
+import pytest
+
+
+@pytest.fixture
+def managers(tmp_path):
+    path = str(tmp_path / "dooit.db")
+
+    manager1 = Manager()
+    manager2 = Manager()
+
+    manager1.connect(path)
+    manager2.connect(path)
+
+    yield manager1, manager2
+
+    manager1.session.close()
+    manager2.session.close()
+
+
+def test_sync(managers):
+    manager1, manager2 = managers
+
+    w = Workspace(description="test")
+    manager1.save(w)
+
+    assert not manager1.has_changed()
+    assert manager2.has_changed()
+    assert not manager2.has_changed()
+
+
+def test_changed_rows(managers):
+    manager1, manager2 = managers
+
+    w = Workspace(description="test")
+    manager1.save(w)
+    manager2.poll_changes()
+
+    t = Todo(description="todo", parent_workspace=w)
+    manager1.save(t)
+
+    changes = manager2.poll_changes()
+    assert changes.updated == {t.uuid}
+    assert changes.parents == {w.uuid}
+    assert changes.tables == {"todo"}
+
+    manager1.delete(t)
+
+    changes = manager2.poll_changes()
+    assert changes.deleted == {t.uuid}
+    assert not changes.updated
+
+
+def test_changes_before_local_save(managers):
+    manager1, manager2 = managers
+    manager2.poll_changes()
+
+    external = Workspace(description="external")
+    manager1.save(external)
+    manager2.save(Workspace(description="own"))
+
+    changes = manager2.poll_changes()
+    assert external.uuid in changes.updated
+    assert manager2.session.get(Workspace, external.id) is not None
+
+
+async def test_changes_before_local_save_on_worker(managers):
+    manager1, manager2 = managers
+    await manager2.poll_changes_async()
+
+    external = Workspace(description="external")
+    manager1.save(external)
+    manager2.save(Workspace(description="own"))
+
+    changes = await manager2.poll_changes_async()
+    assert external.uuid in changes.updated
+
+
+def test_targeted_refetch(managers):
+    manager1, manager2 = managers
+
+    w1 = Workspace(description="one")
+    w2 = Workspace(description="two")
+    manager1.save(w1)
+    manager1.save(w2)
+    manager2.poll_changes()
+
+    other_w1 = manager2.session.get(Workspace, w1.id)
+    other_w2 = manager2.session.get(Workspace, w2.id)
+    assert other_w1 is not None and other_w2 is not None
+
+    todos = [Todo(description=str(i), parent_workspace=w1) for i in range(50)]
+    manager1.session.add_all(todos)
+    manager1.commit()
+    manager2.poll_changes()
+    other_todos = [manager2.session.get(Todo, todo.id) for todo in todos]
+
+    w1.description = "changed"
+    for todo in todos:
+        todo.description += " changed"
+    manager1.commit()
+
+    statements = []
+
+    def count(*_):
+        statements.append(None)
+
+    event.listen(manager2.engine, "before_cursor_execute", count)
+    try:
+        changes = manager2.poll_changes()
+        assert changes.updated == {w1.uuid, *(todo.uuid for todo in todos)}
+
+        # re-fetched with a query per table, the values are already there
+        selects = len(statements)
+        assert other_w1.__dict__["description"] == "changed"
+        assert [todo.description for todo in other_todos] == [
+            f"{i} changed" for i in range(50)
+        ]
+        assert len(statements) == selects
+    finally:
+        event.remove(manager2.engine, "before_cursor_execute", count)
+
+    assert "description" in other_w2.__dict__
+
+
+def test_full_refetch(managers):
+    manager1, manager2 = managers
+
+    w = Workspace(description="one")
+    gone = Workspace(description="gone")
+    manager1.save(w)
+    manager1.save(gone)
+    manager2.poll_changes()
+
+    other_w = manager2.session.get(Workspace, w.id)
+    other_gone = manager2.session.get(Workspace, gone.id)
+
+    w.description = "changed"
+    manager1.commit()
+    manager1.delete(gone)
+
+    manager2.apply_changes(ChangeSet(full=True))
+    assert other_w.__dict__["description"] == "changed"
+    assert other_gone not in manager2.session
+
+
+async def test_changes_read_on_worker(managers):
+    manager1, manager2 = managers
+    assert manager2.worker is not None
+
+    w = Workspace(description="test")
+    manager1.save(w)
+
+    changes = await manager2.poll_changes_async()
+    assert changes.updated == {w.uuid}
+    assert not await manager2.poll_changes_async()
+
+    # our own rows are read back, re-fetching them is harmless
+    own = Workspace(description="own")
+    manager2.save(own)
+    changes = await manager2.poll_changes_async()
+    assert changes.updated == {own.uuid}
+    assert not await manager2.poll_changes_async()
+
+    w.description = "changed"
+    manager1.commit()
+
+    changes = await manager2.poll_changes_async()
+    assert changes.updated == {w.uuid}
+
+
+def test_versions(managers):
+    manager1, _ = managers
+    start = datetime.now()
+
+    w = Workspace(description="test")
+    manager1.save(w)
+    assert w.version == 1
+    assert w.updated_at is not None and w.updated_at >= start
+
+    saved_at = w.updated_at
+    w.description = "changed"
+    manager1.commit()
+    assert w.version == 2
+    assert w.updated_at > saved_at
+
+
+def test_concurrent_edit(managers):
+    manager1, manager2 = managers
+
+    w = Workspace(description="test")
+    manager1.save(w)
+    other_w = manager2.session.get(Workspace, w.id)
+    assert other_w is not None
+
+    w.description = "first"
+    manager1.commit()
+
+    # saved over a version which is no longer the latest
+    other_w.description = "second"
+    with pytest.raises(ConcurrentEditError):
+        manager2.commit()
+
+    assert other_w.description == "first"
+    assert other_w.version == 2
+
+    other_w.description = "second"
+    manager2.commit()
+    assert other_w.version == 3
+
+
+def test_concurrent_delete(managers):
+    manager1, manager2 = managers
+
+    w = Workspace(description="test")
+    manager1.save(w)
+    other_w = manager2.session.get(Workspace, w.id)
+
+    w.description = "changed"
+    manager1.commit()
+
+    with pytest.raises(ConcurrentEditError):
+        manager2.delete(other_w)
+
+    assert manager2.session.get(Workspace, w.id) is not None
+
+
+def test_existing_database(tmp_path):
+    path = str(tmp_path / "dooit.db")
+    manager = Manager()
+    manager.connect(path)
+    manager.save(Workspace(description="test"))
+    manager.session.close()
+
+    # a database from before the versions existed
+    with manager.engine.begin() as connection:
+        for table in ("todo", "workspace"):
+            connection.execute(text(f"DROP TRIGGER {table}_path_move"))
+            connection.execute(text(f"DROP INDEX ix_{table}_updated_at"))
+            connection.execute(text(f"ALTER TABLE {table} DROP COLUMN version"))
+            connection.execute(text(f"ALTER TABLE {table} DROP COLUMN updated_at"))
+
+    manager.connect(path)
+    w = manager.session.scalars(select(Workspace).filter_by(description="test")).one()
+    assert w.version == 1
+    assert w.updated_at is None
+
+    w.description = "changed"
+    manager.commit()
+    assert w.version == 2
+    assert w.updated_at is not None
+    manager.session.close()
+
+
+@pytest.mark.parametrize("stale", ["child", "parent"])
+def test_propagated_change_conflicts(managers, stale):
+    manager1, manager2 = managers
+
+    w = Workspace(description="test")
+    manager1.save(w)
+    parent = Todo(description="parent", parent_workspace=w)
+    manager1.save(parent)
+    child = Todo(description="child", parent_todo=parent)
+    manager1.save(child)
+
+    other_parent = manager2.session.get(Todo, parent.id)
+    other_child = manager2.session.get(Todo, child.id)
+    assert other_parent is not None and other_child is not None
+
+    # completed along with the other one, by the hooks
+    if stale == "child":
+        parent.pending = False
+        other = other_child
+    else:
+        child.pending = False
+        other = other_parent
+    manager1.commit()
+
+    other.description = "stale"
+    with pytest.raises(ConcurrentEditError):
+        manager2.commit()
+
+    assert other.pending is False
+
+
+def test_sibling_shift_conflicts(tmp_path):
+    path = str(tmp_path / "dooit.db")
+    other = Manager()
+    other.connect(path)
+    manager.connect(path)
+
+    w = Workspace(description="test")
+    w.save()
+    a = Todo(description="a", parent_workspace=w)
+    a.save()
+    b = Todo(description="b", parent_workspace=w)
+    b.save()
+    assert b.siblings == [a, b]
+
+    # shifts the loaded siblings down, with the hooks
+    other_w = other.session.get(Workspace, w.id)
+    other.save(Todo(description="new", parent_workspace=other_w, order_index=0))
+
+    with pytest.raises(ConcurrentEditError):
+        b.shift_up()
+
+    query = select(Todo.description, Todo.order_index).order_by(Todo.order_index)
+    assert manager.session.execute(query).all() == [("new", 0), ("a", 1), ("b", 2)]
+
+    other.session.close()
+    manager.session.close()
+
+
+def test_drop_conflicts(tmp_path):
+    path = str(tmp_path / "dooit.db")
+    other = Manager()
+    other.connect(path)
+    manager.connect(path)
+
+    w = Workspace(description="test")
+    w.save()
+    t = Todo(description="todo", parent_workspace=w)
+    t.save()
+    t.add_todo()
+    assert t.version == 1
+
+    other_t = other.session.get(Todo, t.id)
+    assert other_t is not None
+    other_t.description = "changed"
+    other.commit()
+
+    with pytest.raises(ConcurrentEditError):
+        t.drop()
+
+    assert t.description == "changed"
+    assert len(manager.session.scalars(select(Todo)).all()) == 2
+
+    t.drop()
+    assert manager.session.scalars(select(Todo)).all() == []
+
+    other.session.close()
+    manager.session.close()
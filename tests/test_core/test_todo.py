@@ -1,8 +1,10 @@
 from typing import List, Tuple
 from datetime import datetime, timedelta
 from pytest import raises, mark
+from sqlalchemy import event, inspect, select, text
+from dooit.api.manager import Manager
 from dooit.api.exceptions import NoParentError, MultipleParentError
-from dooit.api import Todo, Workspace
+from dooit.api import Todo, Workspace, manager
 from tests.test_core.core_base import *  # noqa
 
 
@@ -238,3 +240,85 @@ def test_sort(session, create_workspace, field, sort_key, filter_func, compare_i
         assert [i.id for i in old] == [i.id for i in new]
     else:
         assert old == new
+
+
+def test_load_subtree(session, workspace1, todo1, create_todo):
+    nested = create_todo("nested", parent_todo=todo1.todos[0])
+    session.expire_all()
+    session.refresh(workspace1)
+
+    statements = []
+    event.listen(
+        manager.engine, "before_cursor_execute", lambda *args: statements.append(1)
+    )
+
+    todos = Todo.load_subtree(workspace1)
+    assert len(statements) == 1
+    assert len(todos) == 8
+
+    def walk(model) -> List[str]:
+        return [desc for t in model.todos for desc in [t.description, *walk(t)]]
+
+    descriptions = walk(workspace1)
+    assert len(statements) == 1
+    assert descriptions == [
+        "todo a",
+        "todo b",
+        "todo c",
+        "todo 1",
+        "todo a",
+        "nested",
+        "todo b",
+        "todo c",
+    ]
+    assert nested.parent_todo.parent_todo is todo1
+    assert len(statements) == 1
+
+
+def test_sibling_query_uses_index(session, workspace1):
+    query = (
+        select(Todo)
+        .where(Todo.parent_workspace_id == workspace1.id)
+        .order_by(Todo.order_index)
+    )
+    compiled = query.compile(compile_kwargs={"literal_binds": True})
+    plan = session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    details = " ".join(row.detail for row in plan)
+
+    assert "USING INDEX ix_todo_parent_workspace_id" in details
+    assert "TEMP B-TREE" not in details
+
+
+def test_missing_indexes_created(tmp_path):
+    path = str(tmp_path / "dooit.db")
+
+    old = Manager()
+    old.connect(path)
+    with old.engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_todo_parent_todo_id"))
+    old.session.close()
+
+    new = Manager()
+    new.connect(path)
+    indexes = inspect(new.engine).get_indexes("todo")
+    assert "ix_todo_parent_todo_id" in [index["name"] for index in indexes]
+    new.session.close()
+
+
+def test_changed_since(create_workspace, create_todo):
+    w = create_workspace()
+    old = create_todo("old", parent_workspace=w)
+    new = create_todo("new", parent_workspace=w)
+    child = create_todo("child", parent_todo=old)
+
+    since = datetime.now()
+    assert Todo.changed_since(since) == []
+
+    new.description = "changed"
+    new.save()
+    assert Todo.changed_since(since) == [new]
+
+    # the subtree is completed with a bulk update, which sets the time too
+    old.toggle_complete()
+    assert set(Todo.changed_since(since)) == {new, child, old}
+    assert Workspace.changed_since(since) == []
@@ -2,9 +2,9 @@ from typing import Optional
 from rich.text import Text
 from rich.style import Style
 from dooit.api.workspace import Workspace
-from dooit.ui.api.api_components.formatters import FormatterStore
+from dooit.ui.api.api_components.formatters import FormatterCache, FormatterStore
 from dooit.ui.api.dooit_api import DooitAPI
-from dooit.ui.api import extra_formatter
+from dooit.ui.api import extra_formatter, pure_formatter
 from tests.test_ui.ui_base import run_pilot
 from dooit.ui.tui import Dooit
 
@@ -143,3 +143,45 @@ async def test_multiple_formatting_toggle():
         store.remove("italic")
         formatted = store.format_value(w1.description, w1)
         assert formatted.markup == "this is a test description 123"
+
+
+async def test_pure_formatter_cache():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        calls = []
+
+        @pure_formatter
+        def count_calls(value: str, _: Workspace) -> str:
+            calls.append(value)
+            return value.upper()
+
+        cache = FormatterCache(maxsize=2)
+        store = FormatterStore(lambda: None, app.api, cache)
+        store.add(count_calls, id="upper")
+
+        w1, w2, w3 = [Workspace(description=f"w{i}") for i in range(3)]
+        for w in (w1, w2, w3):
+            w.save()
+
+        assert store.format_value(w1.description, w1).plain == "W0"
+        assert store.format_value(w1.description, w1).plain == "W0"
+        assert len(calls) == 1
+        assert cache.info()["hits"] == 1
+
+        store.format_value(w2.description, w2)
+        store.format_value(w3.description, w3)
+        assert len(cache) == 2
+
+        store.format_value(w1.description, w1)
+        assert len(calls) == 4
+
+        icon = store.add(add_icon)
+        store.format_value(w1.description, w1)
+        store.format_value(w1.description, w1)
+        assert len(calls) == 6
+
+        store.remove(icon)
+        store.disable("upper")
+        assert store.format_value(w1.description, w1).plain == "w0"
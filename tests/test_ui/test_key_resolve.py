@@ -2,6 +2,7 @@ from textual import events
 from tests.test_ui.ui_base import run_pilot
 from dooit.ui.tui import Dooit
 from dooit.ui.screens import MainScreen
+from dooit.ui.api.api_components import KeyManager, KeyMatchType
 
 
 async def test_base_screen_keys():
@@ -16,3 +17,63 @@ async def test_base_screen_keys():
 
         assert screen.resolve_key(events.Key("home", None)) == "home"
         assert screen.resolve_key(events.Key("space", " ")) == " "
+
+
+def test_key_chords():
+    keys = KeyManager(lambda: "NORMAL")
+    pressed = []
+    keys.set(["g", "gg"], lambda: pressed.append("top"))
+    keys.set("<tab>j", lambda: pressed.append("tab j"))
+    keys.set("<", lambda: pressed.append("<"))
+
+    def press(*inputs):
+        return [keys.register_key(i).match_type for i in inputs]
+
+    assert press("g", "g") == [
+        KeyMatchType.MultipleMatchFound,
+        KeyMatchType.MatchFound,
+    ]
+    assert press("tab", "j") == [
+        KeyMatchType.MultipleMatchFound,
+        KeyMatchType.MatchFound,
+    ]
+    assert press("tab", "k", "j") == [
+        KeyMatchType.MultipleMatchFound,
+        KeyMatchType.NoMatchFound,
+        KeyMatchType.NoMatchFound,
+    ]
+    assert press("<") == [KeyMatchType.MatchFound]
+
+    press("tab")
+    assert keys.input == "<tab>"
+    assert keys.flush_input().match_type == KeyMatchType.NoMatchFound
+    assert keys.input == ""
+
+    press("g")
+    keymatch = keys.flush_input()
+    assert keymatch.function is not None and keymatch.function.group == ""
+
+
+async def test_key_timeout():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        pressed = []
+        app.api.keys.set("x", lambda: pressed.append("x"))
+        app.api.keys.set("xy", lambda: pressed.append("xy"))
+
+        await pilot.press("x")
+        await pilot.pause(0.1)
+        assert pressed == []
+        assert app.api.keys.input == "x"
+
+        app.api.keys.clear_input()
+        app.api.vars.key_timeout = 0.3
+        await pilot.press("x")
+        await pilot.pause(0.4)
+        assert pressed == ["x"]
+
+        await pilot.press("x", "y")
+        await pilot.pause(0.4)
+        assert pressed == ["x", "xy"]
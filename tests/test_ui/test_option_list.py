@@ -0,0 +1,45 @@
+from textual.app import App, ComposeResult
+from textual.widgets import OptionList
+from textual.widgets.option_list import Option
+from dooit.ui.tui import Dooit  # noqa: F401, imports the widgets in order
+from dooit.ui.widgets.trees import _option_list
+
+
+class OptionListApp(App):
+    def compose(self) -> ComposeResult:
+        yield OptionList(Option("a", id="a"), Option("b\nb", id="b"))
+
+
+async def test_option_list_internals():
+    # fails first if a Textual upgrade changed the internals the trees use
+    async with OptionListApp().run_test() as pilot:
+        option_list = pilot.app.query_one(OptionList)
+        await pilot.pause()
+
+        a, b = option_list.options
+        assert _option_list.lines(option_list) == [(0, 0), (1, 0), (1, 1)]
+        assert _option_list.line_height(option_list, 1) == 2
+        assert _option_list.measured_heights(option_list) == {a: 1, b: 2}
+        assert _option_list.measure_option(option_list, b) == 2
+        assert 0 < _option_list.prompt_width(option_list) <= 80
+
+        # known heights are reused, new options are measured
+        c = Option("c\nc\nc", id="c")
+        _option_list.replace_options(option_list, [c, a], {a: 1})
+        assert option_list.options == [c, a]
+        assert option_list.get_option("a") is a
+        assert option_list.get_option_index("a") == 1
+        assert _option_list.lines(option_list) == [(0, 0), (0, 1), (0, 2), (1, 0)]
+
+        _option_list.set_prompt(a, "a\na")
+        _option_list.clear_caches(option_list)
+        await pilot.pause()
+        assert a.prompt == "a\na"
+        assert _option_list.line_height(option_list, 1) == 2
+
+        _option_list.clear_lines(option_list)
+        assert _option_list.line_height(option_list, 1) is None
+
+        c.disabled = True
+        assert _option_list.find_next_enabled(option_list.options, 0) == 1
+        assert _option_list.option_height(a, 2) == 2
@@ -1,6 +1,8 @@
 from dooit.ui.widgets.trees.todos_tree import TodosTree
 from tests.test_ui.ui_base import run_pilot, create_and_move_to_todo
 from dooit.ui.tui import Dooit
+from dooit.ui.widgets.trees._search_index import SearchIndex
+from dooit.ui.widgets.bars import GlobalSearchBar
 
 
 async def test_search():
@@ -40,6 +42,17 @@ async def test_search():
         await pilot.press(*list("applet"))
         assert sum(i.disabled for i in tree._options) == 3
 
+        renderers = [tree._renderers[option.id] for option in tree._options]
+        assert [r.matches_filter("applet") for r in renderers] == [
+            not option.disabled for option in tree._options
+        ]
+        assert [r.matches_filter("pri") for r in renderers] == [
+            False,
+            False,
+            False,
+            True,
+        ]
+
         # confirm search
         await pilot.press("enter")
         assert app.bar_switcher.current == "status_bar"
@@ -57,3 +70,61 @@ async def test_search():
 
         await pilot.pause()
         assert sum(i.disabled for i in tree._options) == 0
+        assert tree.current.matches_filter("app")
+        assert tree._search_index is None
+
+
+def test_search_index():
+    index = SearchIndex({"a": "apple pie", "b": "apricot", "c": "grape"})
+
+    assert index.search("ap") == {"a", "b", "c"}
+    assert index._trigrams is None
+
+    # narrowed down from the previous results
+    assert index.search("ape") == {"c"}
+    assert index._trigrams is None
+
+    assert index.search("pie") == {"a"}
+    assert index._trigrams is not None
+    assert index.search("icot") == {"b"}
+    assert index.search("ap") == {"a", "b", "c"}
+    assert index.search("xyz") == set()
+
+
+async def test_global_search():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+        tree = await create_and_move_to_todo(pilot)
+
+        tree.add_sibling()
+        await pilot.press(*list("apple"), "escape")
+        tree.add_child_node()
+        await pilot.press(*list("banana @fruit"), "escape")
+        tree.toggle_expand_parent()
+        await pilot.pause()
+        assert len(tree._options) == 1
+
+        # leave the todos for another workspace
+        app.api.switch_focus()
+        await pilot.pause()
+        app.workspace_tree.add_sibling()
+        await pilot.press(*list("other"), "escape")
+        await pilot.pause()
+        assert app.api.vars.todos_tree is not tree
+
+        app.api.start_global_search()
+        await pilot.pause()
+        assert app.bar_switcher.current == "global_search_bar"
+
+        await pilot.press(*list("@fr"))
+        bar = app.bar_switcher.query_one(GlobalSearchBar)
+        assert [i.description for i in bar.results] == ["banana @fruit"]
+
+        await pilot.press("enter")
+        await pilot.pause()
+
+        assert app.bar_switcher.current == "status_bar"
+        assert app.api.vars.todos_tree is tree
+        assert app.focused is tree
+        assert tree.current_model.description == "banana @fruit"
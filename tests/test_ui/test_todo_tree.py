@@ -1,9 +1,12 @@
 from datetime import datetime, timedelta
 from pytest import raises
+from sqlalchemy import text
 from dooit.api.exceptions import NoNodeError
-from dooit.api import Todo
+from dooit.api import Todo, manager
+from dooit.ui.api import pure_formatter
 from dooit.ui.api.widgets import TodoWidget
 from dooit.ui.widgets.renderers.base_renderer import BaseRenderer
+from dooit.ui.widgets.renderers.lazy_prompt import LazyPrompt
 from tests.test_ui.ui_base import run_pilot, create_and_move_to_todo
 from dooit.ui.tui import Dooit
 
@@ -113,6 +116,219 @@ async def test_remove_todo():
         assert tree.highlighted is None
 
 
+async def test_expand_collapse_keeps_options():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+
+        for description in ["first", "second"]:
+            tree.add_sibling()
+            await pilot.press(*list(description))
+            await pilot.press("escape")
+
+        tree.highlighted = 0
+        tree.add_child_node()
+        await pilot.press("a", "escape")
+        tree.add_sibling()
+        await pilot.press("b", "escape")
+
+        options = list(tree._options)
+        assert len(options) == 4
+
+        tree.toggle_expand_parent()
+        assert tree._options == [options[0], options[3]]
+        assert tree.highlighted == 0
+
+        tree.toggle_expand()
+        assert len(tree._options) == 4
+        assert tree._options[0] is options[0]
+        assert tree._options[3] is options[3]
+        indexes = [tree.get_option_index(option.id) for option in tree._options]
+        assert indexes == [0, 1, 2, 3]
+
+
+async def test_nest_level_from_tree():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+
+        tree.add_sibling()
+        await pilot.press("a", "escape")
+        tree.add_child_node()
+        await pilot.press("b", "escape")
+        tree.add_child_node()
+        await pilot.press("c", "escape")
+
+        def levels():
+            return [tree._renderers[option.id].nest_level for option in tree._options]
+
+        assert levels() == [0, 1, 2]
+        assert levels() == [r.model.nest_level for r in tree._renderers.values()]
+
+        # collapsed and expanded again from the middle of the tree
+        tree.highlighted = 1
+        tree.toggle_expand()
+        assert levels() == [0, 1]
+        tree.toggle_expand()
+        assert levels() == [0, 1, 2]
+
+
+async def test_column_width_counts_displayed_rows():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+
+        tree.add_sibling()
+        await pilot.press(*list("short"))
+        await pilot.press("escape")
+        assert tree.get_column_width("description") == len("short") + 1
+
+        tree.add_child_node()
+        await pilot.press(*list("a much longer child"))
+        await pilot.press("escape")
+        assert tree.get_column_width("description") == len("a much longer child") + 1
+
+        tree.toggle_expand_parent()
+        assert tree.get_column_width("description") == len("short") + 1
+
+
+async def test_expand_changes_column_width():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+
+        tree.add_sibling()
+        await pilot.press("a", "escape")
+        parent = tree._renderers[tree.current_model.uuid]
+        tree.add_child_node()
+        await pilot.press("b", "escape")
+        tree.current_model.due = datetime(2030, 1, 1, 12, 30)
+        tree.current_model.save()
+
+        tree.toggle_expand_parent()
+        await pilot.pause()
+        narrow = tree.get_column_width("due")
+        collapsed = tree.get_option(parent.id).prompt
+
+        # the parent row is built again with the child's wider due date
+        tree.toggle_expand()
+        await pilot.pause()
+        assert tree.get_column_width("due") > narrow
+        expanded = tree.get_option(parent.id).prompt
+        assert expanded is not collapsed
+        assert expanded.key == parent.get_prompt_key()
+
+        tree.toggle_expand()
+        await pilot.pause()
+        assert tree.get_column_width("due") == narrow
+        assert tree.get_option(parent.id).prompt is not expanded
+
+
+async def test_prompts_built_for_visible_rows():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+
+        for _ in range(200):
+            tree.model.add_todo()
+
+        tree.force_refresh()
+        await pilot.pause()
+
+        prompts = [option.prompt for option in tree._options]
+        assert all(isinstance(prompt, LazyPrompt) for prompt in prompts)
+
+        built = sum(prompt.is_built for prompt in prompts)
+        assert 0 < built < 100
+
+
+async def test_prompt_cache():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+
+        for description in ["one", "two", "three"]:
+            tree.add_sibling()
+            await pilot.press(*list(description))
+            await pilot.press("escape")
+
+        await pilot.pause()
+        prompts = [option.prompt for option in tree._options]
+        assert all(isinstance(p, LazyPrompt) and p.is_built for p in prompts)
+
+        tree.refresh_options()
+        assert [option.prompt for option in tree._options] == prompts
+
+        app.api.formatter.todos.description.add(custom_formatter)
+        new_prompts = [option.prompt for option in tree._options]
+        assert all(new not in prompts for new in new_prompts)
+
+
+async def test_prompt_impure_formatter():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+        tree.add_sibling()
+        await pilot.press("escape")
+        output = ["before"]
+
+        def changing_formatter(value, todo):
+            return output[0]
+
+        app.api.formatter.todos.description.add(changing_formatter)
+        await pilot.pause()
+        option = tree.options[0]
+        prompt = option.prompt
+        assert "before" in tree.render_line(0).text
+
+        output[0] = "after"
+        tree.refresh_options()
+        await pilot.pause()
+        assert option.prompt is not prompt
+        assert "after" in tree.render_line(0).text
+
+
+async def test_prompt_ttl():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+        tree.add_sibling()
+        await pilot.press("escape")
+
+        @pure_formatter(ttl=0.1)
+        def timed_formatter(value, todo):
+            return value
+
+        app.api.formatter.todos.description.add(timed_formatter)
+        await pilot.pause()
+        option = tree.options[0]
+        prompt = option.prompt
+        assert prompt.is_built and not prompt.is_expired
+
+        tree.refresh_options()
+        assert option.prompt is prompt
+
+        await pilot.pause(0.1)
+        tree.refresh_options()
+        assert option.prompt is not prompt
+
+
 async def test_due():
     async with run_pilot() as pilot:
         app = pilot.app
@@ -238,3 +454,80 @@ async def test_recurrence_change():
         await pilot.press("escape")
 
         assert todo.recurrence == timedelta(days=1)
+
+
+async def test_concurrent_edit():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+        tree.add_sibling()
+        await pilot.press(*list("mine"))
+
+        # another instance saves the todo while it is being edited
+        manager.session.execute(
+            text("UPDATE todo SET version = version + 1 WHERE id = :id"),
+            {"id": tree.current_model.id},
+        )
+        await pilot.press("escape")
+        await pilot.pause()
+
+        assert not tree.is_editing
+        assert app.bar_switcher.current == "notification_bar"
+
+
+async def test_delayed_commit():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+        app.api.vars.commit_delay = 0.05
+
+        tree.add_sibling()
+        await pilot.press("a", "escape")
+        parent_id = tree.current_model.uuid
+        tree.add_child_node()
+        await pilot.press("b", "escape")
+        child = tree._renderers[tree.current_model.uuid]
+
+        tree.highlight_id(parent_id)
+        tree.toggle_complete()
+        await pilot.pause(0.1)
+
+        # the row drawn after the toggle shows the child completed too
+        drawn = child._prompt
+        assert drawn is not None and drawn.key is not None
+        assert drawn.key == child.get_prompt_key()
+        assert child.model.status == "completed"
+
+        # errors of the delayed commit are shown in the bar
+        assert manager.on_commit_error is not None
+        manager.on_commit_error(Exception("commit failed"))
+        await pilot.pause()
+        assert app.bar_switcher.current == "notification_bar"
+
+        app.api.vars.commit_delay = None
+
+
+async def test_delayed_commit_on_exit():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+        app.api.vars.commit_delay = 60
+
+        tree.add_sibling()
+        await pilot.press(*list("kept"), "escape")
+        assert manager._pending_commit is not None
+
+        # leaving without the quit action
+        app.exit()
+
+    # committed, as rolling back leaves it there
+    manager.session.rollback()
+    descriptions = manager.session.scalars(text("SELECT description FROM todo")).all()
+    assert "kept" in descriptions
+    manager.commit_delay = None